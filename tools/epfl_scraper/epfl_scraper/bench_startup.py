@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+HEAVY_MODULES = ("trafilatura", "bs4", "lxml", "httpx", "nltk", "requests")
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# name -> Python statement run in a fresh interpreter
+TARGETS: Dict[str, str] = {
+    "import epfl_scraper.cli": "import epfl_scraper.cli",
+    "epfl_scraper --help": (
+        "from epfl_scraper.cli import main\n"
+        "try:\n    main(['--help'])\nexcept SystemExit:\n    pass"
+    ),
+    "import epfl_scraper.crawler": "import epfl_scraper.crawler",
+    "import index_texts": "import index_texts",
+}
+
+
+def _probe(statement: str) -> str:
+    """Run ``statement``, then print which heavy modules it loaded."""
+    return (
+        "import sys, io, contextlib\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        + "".join(f"    {line}\n" for line in statement.splitlines())
+        + f"print(__import__('json').dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+
+
+def measure(statement: str, runs: int) -> Dict[str, object]:
+    """Median wall time of a fresh interpreter running ``statement``, and the heavy modules it loads."""
+    timings: List[float] = []
+    loaded: List[str] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", _probe(statement)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        timings.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+        loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {"median_ms": round(statistics.median(timings) * 1000, 1), "heavy_modules": loaded}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure start-up time of the scraper entry points")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    baseline = measure("pass", args.runs)
+    results = {"python -c pass": baseline}
+    results.update((name, measure(stmt, args.runs)) for name, stmt in TARGETS.items())
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, res in results.items():
+        if "error" in res:
+            print(f"{name:<30} error: {res['error']}")
+        else:
+            heavy = ", ".join(res["heavy_modules"]) or "-"
+            print(f"{name:<30} {res['median_ms']:>8.1f} ms   heavy: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
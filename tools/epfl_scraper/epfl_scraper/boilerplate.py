@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Set
+
+# Paragraphs shorter than this are too generic to fingerprint reliably
+# ("Contact", "Share", ...) and are left untouched.
+MIN_PARAGRAPH_CHARS = 40
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n|\n")
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+@dataclass
+class BoilerplateStats:
+    records: int = 0
+    paragraphs: int = 0
+    boilerplate_paragraphs: int = 0
+    paragraphs_removed: int = 0
+    bytes_removed: int = 0
+    shared_chunks: int = 0
+    duplicate_chunks_dropped: int = 0
+    duplicate_bytes_dropped: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_removed + self.duplicate_bytes_dropped
+
+    def summary(self) -> str:
+        return (
+            f"records={self.records} paragraphs={self.paragraphs} "
+            f"boilerplate={self.boilerplate_paragraphs} removed={self.paragraphs_removed} "
+            f"shared_chunks={self.shared_chunks} dup_chunks={self.duplicate_chunks_dropped} "
+            f"bytes_saved={self.bytes_saved}"
+        )
+
+
+@dataclass
+class BoilerplateIndex:
+    """Paragraph fingerprints seen on at least ``min_docs`` distinct records."""
+
+    fingerprints: Set[str] = field(default_factory=set)
+    # One representative paragraph text per fingerprint, used for shared chunks
+    examples: Dict[str, str] = field(default_factory=dict)
+    doc_counts: Dict[str, int] = field(default_factory=dict)
+
+    def __contains__(self, fp: str) -> bool:
+        return fp in self.fingerprints
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+
+def split_paragraphs(text: str) -> List[str]:
+    return [p.strip() for p in _PARAGRAPH_SPLIT.split(text or "") if p.strip()]
+
+
+def fingerprint(text: str) -> str:
+    """Hash of the normalized text: case, accents and punctuation are ignored.
+
+    Numbers are kept, so paragraphs that differ only by a date, fee or deadline
+    stay distinct and are never replaced by another page's copy.
+    """
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    folded = _NON_WORD.sub(" ", folded).strip()
+    return hashlib.sha1(folded.encode("utf-8")).hexdigest()
+
+
+def build_boilerplate_index(
+    records: Iterable[Dict[str, Any]],
+    min_docs: int = 5,
+    min_ratio: float = 0.0,
+    stats: BoilerplateStats | None = None,
+) -> BoilerplateIndex:
+    """Count, for each paragraph fingerprint, how many records contain it.
+
+    A paragraph is boilerplate when it appears in at least ``min_docs`` records
+    and in at least ``min_ratio`` of all records.
+    """
+    doc_freq: Counter[str] = Counter()
+    examples: Dict[str, str] = {}
+    n_records = 0
+    n_paragraphs = 0
+    for rec in records:
+        text = rec.get("text") or ""
+        if not text.strip():
+            continue
+        n_records += 1
+        fps: Set[str] = set()
+        for para in split_paragraphs(text):
+            n_paragraphs += 1
+            if len(para) < MIN_PARAGRAPH_CHARS:
+                continue
+            fp = fingerprint(para)
+            fps.add(fp)
+            examples.setdefault(fp, para)
+        doc_freq.update(fps)
+
+    threshold = max(2, min_docs, math.ceil(min_ratio * n_records))
+    keep = {fp for fp, n in doc_freq.items() if n >= threshold}
+    if stats is not None:
+        stats.records += n_records
+        stats.paragraphs += n_paragraphs
+        stats.boilerplate_paragraphs += len(keep)
+    return BoilerplateIndex(
+        fingerprints=keep,
+        examples={fp: examples[fp] for fp in keep},
+        doc_counts={fp: doc_freq[fp] for fp in keep},
+    )
+
+
+def strip_boilerplate(text: str, index: BoilerplateIndex, stats: BoilerplateStats | None = None) -> str:
+    """Drop boilerplate paragraphs from ``text`` and return what is left."""
+    if not index:
+        return text
+    kept: List[str] = []
+    for para in split_paragraphs(text):
+        if len(para) >= MIN_PARAGRAPH_CHARS and fingerprint(para) in index:
+            if stats is not None:
+                stats.paragraphs_removed += 1
+                stats.bytes_removed += len(para.encode("utf-8"))
+            continue
+        kept.append(para)
+    return "\n".join(kept)
+
+
+def shared_chunks(index: BoilerplateIndex, stats: BoilerplateStats | None = None) -> List[Dict[str, Any]]:
+    """One chunk per boilerplate paragraph so the content stays searchable once."""
+    out: List[Dict[str, Any]] = []
+    for fp in sorted(index.fingerprints):
+        out.append({
+            "id": f"boilerplate_{fp}",
+            "text": index.examples[fp],
+            "title": None,
+            "url": None,
+            "payload": {
+                "boilerplate": True,
+                "occurrences": index.doc_counts.get(fp, 0),
+                "source": "epfl_scraper",
+            },
+        })
+    if stats is not None:
+        stats.shared_chunks += len(out)
+    return out
+
+
+def drop_duplicate_chunks(
+    chunks: Iterable[Dict[str, Any]],
+    seen: Set[str],
+    stats: BoilerplateStats | None = None,
+) -> List[Dict[str, Any]]:
+    """Keep the first chunk for each near-identical text; ``seen`` is shared across calls."""
+    out: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        fp = fingerprint(chunk.get("text") or "")
+        if fp in seen:
+            if stats is not None:
+                stats.duplicate_chunks_dropped += 1
+                stats.duplicate_bytes_dropped += len((chunk.get("text") or "").encode("utf-8"))
+            continue
+        seen.add(fp)
+        out.append(chunk)
+    return out
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+
+class CachedExtraction(NamedTuple):
+    text: Optional[str]
+    title: Optional[str]
+    lang: Optional[str]
+    links: List[str]
+
+
+class ExtractionCache:
+    """Persistent extraction results keyed by a hash of the decoded body, its base URL and the extractor.
+
+    The base URL (``final_url``) is part of the key because relative links resolve
+    against it; an unchanged page, or several URLs redirecting to one page, still
+    hit. Entries are evicted least-recently-used first once their total size
+    exceeds ``max_bytes``.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30.0, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key BLOB PRIMARY KEY,
+                text TEXT,
+                title TEXT,
+                lang TEXT,
+                links TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                used INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+            """
+        )
+        size, used = self._db.execute("SELECT COALESCE(SUM(size), 0), COALESCE(MAX(used), 0) FROM entries").fetchone()
+        self._size: int = size
+        self._clock: int = used
+
+    @staticmethod
+    def key(html: str, base_url: str, extractor: str = "") -> bytes:
+        """Digest of the body, its base URL and the extractor backend that produced the entry."""
+        h = hashlib.sha256(f"{extractor}\0{base_url}\0".encode("utf-8"))
+        h.update(html.encode("utf-8", "surrogatepass"))
+        return h.digest()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get(self, key: bytes) -> Optional[CachedExtraction]:
+        row = self._db.execute("SELECT text, title, lang, links FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._db.execute("UPDATE entries SET used = ? WHERE key = ?", (self._tick(), key))
+        text, title, lang, links = row
+        return CachedExtraction(text, title, lang, json.loads(links))
+
+    def put(self, key: bytes, text: Optional[str], title: Optional[str], lang: Optional[str], links: List[str]) -> None:
+        links_json = json.dumps(links, ensure_ascii=False)
+        size = len(key) + len(links_json) + sum(len(v) for v in (text, title, lang) if v)
+        old = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries (key, text, title, lang, links, size, used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, text, title, lang, links_json, size, self._tick()),
+        )
+        self._size += size - (old[0] if old else 0)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        # Drop down to 90% so eviction runs once per batch of inserts, not on each one
+        target = int(self.max_bytes * 0.9)
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            while self._size > target:
+                rows = self._db.execute("SELECT key, size FROM entries ORDER BY used LIMIT 256").fetchall()
+                if not rows:
+                    break
+                for key, size in rows:
+                    if self._size <= target:
+                        break
+                    self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._size -= size
+                    self.evictions += 1
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"hits={self.hits} misses={self.misses} hit_rate={rate:.2f} evictions={self.evictions} size={self._size}"
+
+    def close(self) -> None:
+        self._db.close()
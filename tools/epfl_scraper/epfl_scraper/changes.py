@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from .storage import atomic_write_text, iso_now
+
+ADDED = "added"
+MODIFIED = "modified"
+UNCHANGED = "unchanged"
+REMOVED = "removed"
+
+
+class ChangeFeed:
+    """Compares page checksums against the previous completed crawl and logs the differences.
+
+    ``manifest.json`` maps each URL of the last completed crawl to its checksum.
+    During a crawl, one line per page goes to ``changes.current.jsonl``:
+    ``{"url", "change", "checksum", "section", "reason", "at"}``, where
+    ``change`` is ``added``, ``modified``, ``unchanged`` or ``removed``. When the
+    crawl completes, pages of the manifest that were no longer linked are logged as
+    removed, while linked pages that could not be fetched keep their old checksum.
+    The log is then renamed to ``changes-<timestamp>-<id>.jsonl`` and the manifest
+    is replaced.
+    """
+
+    def __init__(self, changes_dir: Path, fresh: bool = False) -> None:
+        self.dir = changes_dir
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.previous: Dict[str, str] = {}
+        if self.manifest_file.exists():
+            self.previous = json.loads(self.manifest_file.read_text(encoding="utf-8"))
+        # url -> checksum seen in this crawl (None once the page is gone)
+        self.current: Dict[str, Optional[str]] = {}
+        self.counts: Dict[str, int] = {ADDED: 0, MODIFIED: 0, UNCHANGED: 0, REMOVED: 0}
+        # Pages of the manifest kept as they were because they could not be fetched
+        self.carried = 0
+        if fresh and self.log_file.exists():
+            self.log_file.unlink()
+        elif self.log_file.exists():
+            # Resuming: the log was already cut back to the last checkpoint
+            for line in self.log_file.read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    self._apply(json.loads(line))
+        self._fh = self.log_file.open("a", encoding="utf-8")
+
+    @property
+    def manifest_file(self) -> Path:
+        return self.dir / "manifest.json"
+
+    @property
+    def log_file(self) -> Path:
+        return self.dir / "changes.current.jsonl"
+
+    def _apply(self, entry: dict) -> None:
+        self.current[entry["url"]] = entry.get("checksum") if entry["change"] != REMOVED else None
+        self.counts[entry["change"]] += 1
+
+    def _append(self, entry: dict) -> None:
+        self._apply(entry)
+        self._fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+    def record(self, url: str, checksum: str, section: Optional[str] = None) -> str:
+        """Log a fetched page and return its change kind."""
+        old = self.previous.get(url)
+        kind = ADDED if old is None else (UNCHANGED if old == checksum else MODIFIED)
+        self._append({"url": url, "change": kind, "checksum": checksum, "section": section, "at": iso_now()})
+        return kind
+
+    def gone(self, url: str, reason: str, section: Optional[str] = None) -> bool:
+        """Log a page of the previous crawl that no longer exists; False if it was unknown."""
+        if url not in self.previous or url in self.current:
+            return False
+        self._append({"url": url, "change": REMOVED, "checksum": None, "section": section, "reason": reason, "at": iso_now()})
+        return True
+
+    def sync(self) -> Dict[str, int]:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        return {str(self.log_file): self._fh.tell()}
+
+    def finish(self, reached: Callable[[str], bool]) -> Optional[Path]:
+        """Close a completed crawl: log unlinked pages as removed, publish the log and manifest.
+
+        ``reached(url)`` tells whether the crawl got to ``url`` at all. Such pages
+        without a record (fetch error, robots, non-HTML, no text) are carried over
+        with their previous checksum. Returns ``None``, publishing nothing, if no
+        page was recorded: that is a failed crawl, not a site without pages.
+        """
+        if not self.current:
+            self.close()
+            return None
+        carried: Dict[str, str] = {}
+        for url, checksum in self.previous.items():
+            if url in self.current:
+                continue
+            if reached(url):
+                carried[url] = checksum
+            else:
+                self.gone(url, "not_linked")
+        self._fh.close()
+        manifest = dict(carried)
+        manifest.update((url, checksum) for url, checksum in self.current.items() if checksum)
+        atomic_write_text(self.manifest_file, json.dumps(manifest, ensure_ascii=False))
+        self.carried = len(carried)
+        # Two crawls finishing within the same second must not overwrite each other's log
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        published = self.dir / f"changes-{stamp}-{uuid.uuid4().hex[:8]}.jsonl"
+        os.replace(self.log_file, published)
+        return published
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+    def summary(self) -> str:
+        return " ".join(f"{k}={v}" for k, v in self.counts.items()) + f" carried_over={self.carried}"
@@ -3,12 +3,15 @@ from __future__ import annotations
 import argparse
 import asyncio
 import logging
+import multiprocessing
+import uuid
 from pathlib import Path
 from typing import List, Optional
 
-from .config import ScraperConfig
-from .crawler import Crawler
+from .config import ScraperConfig, load_sections
+from .extract import EXTRACTORS
 from .logging_setup import configure_logging
+from .sharding import merge_shard_outputs, shard_outputs
 
 
 def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
@@ -61,10 +64,110 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser.add_argument("--retries", dest="retries", type=int, default=3, help="Max retries for 429/5xx")
     parser.add_argument("--backoff", dest="backoff", type=float, default=1.0, help="Base backoff (seconds)")
     parser.add_argument("--jitter", dest="jitter", type=float, default=0.2, help="Jitter added to sleeps (seconds)")
+    parser.add_argument("--no-adaptive-timeouts", dest="adaptive_timeouts", action="store_false", help="Always use --timeout, not per-host timeouts from observed latency")
+    parser.add_argument("--breaker-failures", dest="breaker_failures", type=int, default=5, help="Consecutive failures that pause a host (circuit breaker)")
+    parser.add_argument("--breaker-cooldown", dest="breaker_cooldown", type=float, default=30.0, help="Seconds before a paused host is probed; doubles per failed probe")
     parser.add_argument("--checkpoint-every", dest="checkpoint_every", type=int, default=100, help="Persist frontier every N processed pages")
     parser.add_argument("--log-level", dest="log_level", default="INFO", help="Logging level (e.g., INFO, DEBUG)")
     parser.add_argument("--section", dest="section", default="education", help="Section label for output records")
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--job",
+        dest="job",
+        type=Path,
+        default=None,
+        help="JSON job file listing several sections (seeds, allow paths, output, label) to crawl in one run",
+    )
+    parser.add_argument(
+        "--changes-dir",
+        dest="changes_dir",
+        type=Path,
+        default=None,
+        help="Keep a checksum manifest here and log added/modified/removed pages; unchanged pages are not re-emitted",
+    )
+    parser.add_argument(
+        "--link-graph",
+        dest="link_graph",
+        type=Path,
+        default=None,
+        help="Record the discovered link graph in this directory (analyse with python -m epfl_scraper.graph)",
+    )
+    parser.add_argument(
+        "--trace-dir",
+        dest="trace_dir",
+        type=Path,
+        default=None,
+        help="Write per-URL span traces (Chrome trace format) to this directory",
+    )
+    parser.add_argument(
+        "--trace-sample",
+        dest="trace_sample",
+        type=float,
+        default=0.01,
+        help="Share of URLs traced when --trace-dir is set (0-1)",
+    )
+    parser.add_argument(
+        "--extractor",
+        dest="extractor",
+        choices=list(EXTRACTORS),
+        default="trafilatura",
+        help="Text extractor: trafilatura (best quality), lxml-fast (main/article blocks only) or bs4",
+    )
+    parser.add_argument(
+        "--learn-templates",
+        dest="learn_templates",
+        action="store_true",
+        help="Learn each page layout's content region and extract matching pages without trafilatura",
+    )
+    parser.add_argument(
+        "--extract-cache",
+        dest="extract_cache",
+        type=Path,
+        default=None,
+        help="Extraction cache file; keep it outside --state-dir to reuse it across crawls (default: <state-dir>/extract_cache.sqlite)",
+    )
+    parser.add_argument(
+        "--extract-cache-mb",
+        dest="extract_cache_mb",
+        type=int,
+        default=256,
+        help="Size bound of the extraction cache in MB; 0 disables it",
+    )
+    parser.add_argument("--shards", dest="shards", type=int, default=1, help="Split the URL space into N shards")
+    parser.add_argument(
+        "--shard-index",
+        dest="shard_index",
+        type=int,
+        default=None,
+        help="Run only this shard (e.g. one per machine); default runs all shards as local processes",
+    )
+    parser.add_argument(
+        "--shared-dir",
+        dest="shared_dir",
+        type=Path,
+        default=None,
+        help="Directory of the store shared by all shards (defaults to --state-dir)",
+    )
+    parser.add_argument(
+        "--run-id",
+        dest="run_id",
+        default=None,
+        help="Name of this crawl, identical on every machine; required with --shard-index",
+    )
+    parser.add_argument(
+        "--shard-heartbeat",
+        dest="shard_heartbeat",
+        type=float,
+        default=300.0,
+        help="Seconds without a status update after which a shard counts as dead and is no longer waited for",
+    )
+    parser.add_argument("--merge-shards", dest="merge_shards", action="store_true", help="Only merge shard outputs into --output")
+    args = parser.parse_args(argv)
+    if args.shard_index is not None:
+        if not 0 <= args.shard_index < max(1, args.shards):
+            parser.error(f"--shard-index must be between 0 and {max(1, args.shards) - 1} for --shards {args.shards}")
+        if args.run_id is None and args.shards > 1 and not args.merge_shards:
+            parser.error("--shard-index needs a --run-id shared by all shards of the crawl")
+    return args
 
 
 def apply_lang_presets(args: argparse.Namespace) -> argparse.Namespace:
@@ -97,6 +200,7 @@ def main(argv: Optional[List[str]] = None) -> None:
 
     # Apply language presets
     args = apply_lang_presets(args)
+    sections = load_sections(args.job) if args.job else []
 
     cfg = ScraperConfig(
         start_urls=list(args.start),
@@ -113,14 +217,71 @@ def main(argv: Optional[List[str]] = None) -> None:
         backoff_base_s=args.backoff,
         jitter_s=args.jitter,
         obey_robots=True,
+        adaptive_timeouts=args.adaptive_timeouts,
+        breaker_failures=args.breaker_failures,
+        breaker_cooldown_s=args.breaker_cooldown,
         checkpoint_every=args.checkpoint_every,
+        shard_count=max(1, args.shards),
+        shared_dir=args.shared_dir,
+        # Local shard processes all get the same fresh id
+        run_id=args.run_id or uuid.uuid4().hex,
+        shard_heartbeat_s=args.shard_heartbeat,
+        sections=sections,
+        changes_dir=args.changes_dir,
+        link_graph_dir=args.link_graph,
+        trace_dir=args.trace_dir,
+        trace_sample_rate=args.trace_sample,
+        extractor=args.extractor,
+        learn_templates=args.learn_templates,
+        extract_cache_file=args.extract_cache,
+        extract_cache_mb=args.extract_cache_mb,
     )
 
-    crawler = Crawler(cfg)
     try:
-        asyncio.run(crawler.crawl())
+        if args.merge_shards:
+            _merge_shards(cfg)
+        elif not cfg.sharded or args.shard_index is not None:
+            # The crawler pulls in httpx, trafilatura and bs4; --help and --merge-shards do without
+            from .crawler import Crawler
+
+            asyncio.run(Crawler(cfg if not cfg.sharded else cfg.for_shard(args.shard_index)).crawl())
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            procs = [
+                ctx.Process(target=_crawl_shard, args=(cfg.for_shard(i), level), name=f"shard-{i}")
+                for i in range(cfg.shard_count)
+            ]
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+            _merge_shards(cfg)
     finally:
         try:
             listener.stop()
         except Exception:
             pass
+
+
+def _crawl_shard(cfg: ScraperConfig, level: int) -> None:
+    """Process entry point for one shard."""
+    from .crawler import Crawler
+
+    listener = configure_logging(level=level)
+    try:
+        asyncio.run(Crawler(cfg).crawl())
+    finally:
+        listener.stop()
+
+
+def _merge_shards(cfg: ScraperConfig) -> None:
+    logger = logging.getLogger("epfl_scraper.cli")
+    outputs = list(dict.fromkeys(s.output_jsonl for s in cfg.all_sections))
+    try:
+        # Check every output first, so a bad --shards leaves all of them untouched
+        shards_by_output = {output: shard_outputs(output, cfg.shard_count) for output in outputs}
+    except ValueError as e:
+        raise SystemExit(f"error: {e}; check --shards and --output") from None
+    for output, shards in shards_by_output.items():
+        count = merge_shard_outputs(shards, output)
+        logger.info("merged %d records from %d shards into %s", count, len(shards), output)
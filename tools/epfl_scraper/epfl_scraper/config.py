@@ -1,10 +1,49 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import List, Optional
 
 
+@dataclass
+class SectionConfig:
+    """One crawl target: its seeds, allowed path prefixes, output file and record label."""
+
+    label: str
+    start_urls: List[str]
+    allow_paths: List[str]
+    output_jsonl: Path
+
+
+def load_sections(path: Path) -> List[SectionConfig]:
+    """Read a JSON job file of the form::
+
+        {"sections": [{"label": "education-fr",
+                       "start": ["https://www.epfl.ch/education/fr/"],
+                       "allow_paths": ["/education/fr"],
+                       "output": "data/education_fr.jsonl"}]}
+    """
+    job = json.loads(path.read_text(encoding="utf-8"))
+    sections: List[SectionConfig] = []
+    for raw in job.get("sections", []):
+        try:
+            sections.append(SectionConfig(
+                label=raw["label"],
+                start_urls=list(raw["start"]),
+                allow_paths=list(raw["allow_paths"]),
+                output_jsonl=Path(raw["output"]),
+            ))
+        except KeyError as e:
+            raise ValueError(f"{path}: section {raw!r} is missing {e.args[0]!r}") from None
+    if not sections:
+        raise ValueError(f"{path}: no sections defined")
+    labels = [s.label for s in sections]
+    if len(set(labels)) != len(labels):
+        raise ValueError(f"{path}: duplicate section labels {labels}")
+    return sections
+
+
 @dataclass
 class ScraperConfig:
     start_urls: List[str]
@@ -24,19 +63,101 @@ class ScraperConfig:
     jitter_s: float = 0.2
     obey_robots: bool = True
 
+    # Per-host timeouts from observed latency, and circuit breaker (see fetch.HostHealth)
+    adaptive_timeouts: bool = True
+    timeout_percentile: float = 0.95
+    timeout_multiplier: float = 4.0  # timeout = multiplier x percentile, capped by request_timeout_s
+    min_timeout_s: float = 2.0
+    latency_window: int = 200  # latest successful requests per host
+    latency_min_samples: int = 20  # before that, request_timeout_s applies
+    breaker_failures: int = 5  # consecutive failures that open the breaker
+    breaker_cooldown_s: float = 30.0  # before the first half-open probe; doubles per failed probe
+    breaker_max_cooldown_s: float = 600.0
+    breaker_max_probes: int = 6  # failed probes in a row before the host is given up
+
     # Content limits
     max_content_bytes: int = 5_000_000  # 5 MB safety cap
 
     # Advanced
-    save_frontier: bool = True
+    save_frontier: bool = True  # write checkpoints (frontier, visited, output offsets)
     checkpoint_every: int = 100  # pages
 
+    # Sharding: shard ``shard_index`` of ``shard_count`` owns a hash partition of URLs
+    shard_index: int = 0
+    shard_count: int = 1
+    shared_dir: Optional[Path] = None  # holds the store shared by all shards
+    shard_poll_s: float = 2.0  # idle wait between checks for routed links
+    run_id: str = ""  # same for every shard of one crawl; tells its status rows from older runs
+    shard_heartbeat_s: float = 300.0  # a shard whose status is older than this is taken as dead
+
+    # Change feed: compare checksums with the previous completed crawl (see changes.py)
+    changes_dir: Optional[Path] = None
+
+    # Record the in-scope link graph here (see graph.py)
+    link_graph_dir: Optional[Path] = None
+
+    # Per-URL span traces (Chrome trace format, see tracing.py)
+    trace_dir: Optional[Path] = None
+    trace_sample_rate: float = 0.01  # share of URLs traced
+    trace_max_events: int = 200_000  # per file before rotating
+    trace_max_files: int = 5
+
+    # Text extraction backend, a key of extract.EXTRACTORS
+    extractor: str = "trafilatura"
+
+    # Learn a content-region XPath per page layout and skip trafilatura on matches (see templates.py)
+    learn_templates: bool = False
+
+    # Extraction results cached by body hash (see cache.py); 0 disables
+    extract_cache_file: Optional[Path] = None  # default: state_dir/extract_cache.sqlite
+    extract_cache_mb: int = 256
+
+    # Several sections crawled together; empty means the single section above
+    sections: List[SectionConfig] = field(default_factory=list)
+
     def ensure_dirs(self) -> None:
         if self.mirror_dir:
             self.mirror_dir.mkdir(parents=True, exist_ok=True)
-        self.output_jsonl.parent.mkdir(parents=True, exist_ok=True)
+        for section in self.all_sections:
+            section.output_jsonl.parent.mkdir(parents=True, exist_ok=True)
         self.state_dir.mkdir(parents=True, exist_ok=True)
 
+    @property
+    def all_sections(self) -> List[SectionConfig]:
+        if self.sections:
+            return self.sections
+        return [SectionConfig(self.section, self.start_urls, self.allow_paths, self.output_jsonl)]
+
+    @property
+    def sharded(self) -> bool:
+        return self.shard_count > 1
+
+    @property
+    def shared_store_file(self) -> Path:
+        return (self.shared_dir or self.state_dir) / "shared.sqlite"
+
+    def for_shard(self, index: int) -> "ScraperConfig":
+        """Per-shard copy: own output and state dir, common shared store."""
+        from .sharding import shard_path
+
+        return replace(
+            self,
+            shard_index=index,
+            output_jsonl=shard_path(self.output_jsonl, index, self.shard_count),
+            sections=[
+                replace(s, output_jsonl=shard_path(s.output_jsonl, index, self.shard_count))
+                for s in self.sections
+            ],
+            state_dir=self.state_dir / f"shard-{index:02d}",
+            changes_dir=self.changes_dir / f"shard-{index:02d}" if self.changes_dir else None,
+            link_graph_dir=self.link_graph_dir / f"shard-{index:02d}" if self.link_graph_dir else None,
+            trace_dir=self.trace_dir / f"shard-{index:02d}" if self.trace_dir else None,
+            extract_cache_file=(
+                shard_path(self.extract_cache_file, index, self.shard_count) if self.extract_cache_file else None
+            ),
+            shared_dir=self.shared_dir or self.state_dir,
+        )
+
     @property
     def visited_file(self) -> Path:
         return self.state_dir / "visited_urls.txt"
@@ -44,3 +165,11 @@ class ScraperConfig:
     @property
     def frontier_file(self) -> Path:
         return self.state_dir / "frontier.jsonl"
+
+    @property
+    def checkpoint_file(self) -> Path:
+        return self.state_dir / "checkpoint.json"
+
+    @property
+    def extract_cache_path(self) -> Path:
+        return self.extract_cache_file or self.state_dir / "extract_cache.sqlite"
@@ -2,43 +2,226 @@ from __future__ import annotations
 
 import asyncio
 from collections import deque
-from typing import Deque, List, Optional, Set
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
 import logging
 import signal
 import time
 
-from .config import ScraperConfig
-from .fetch import PoliteHttpClient
-from .extract import extract_text
+from .cache import ExtractionCache
+from .changes import UNCHANGED, ChangeFeed
+from .config import ScraperConfig, SectionConfig
+from .fetch import CLOSED, DEAD, HALF_OPEN, CircuitOpenError, PoliteHttpClient
+from .graph import LinkGraphRecorder
+from .extract import get_extractor
 from .filters import (
     extract_links,
+    allowed_prefix_length,
     has_disallowed_extension,
-    is_allowed_path,
     is_epfl_domain,
     is_html_like_content_type,
     normalize_url,
 )
-from .storage import Frontier, JsonlWriter, VisitedSet, iso_now, save_text_mirror, sha256_text
+from .sharding import SharedStore, shard_for
+from .storage import Checkpoint, Frontier, JsonlWriter, VisitedSet, iso_now, save_text_mirror, sha256_text
+from .templates import TemplateExtractor
+from .tracing import Tracer
 
 
 class Crawler:
     def __init__(self, cfg: ScraperConfig) -> None:
         self.cfg = cfg
-        self.visited = VisitedSet(cfg.visited_file)
+        self.checkpoint = Checkpoint(cfg.checkpoint_file)
+        # Both set by crawl(), once append-only files are rolled back to the checkpoint
+        self._resume: Optional[dict] = None
+        self.visited: VisitedSet
+        # Frontier file of state dirs written before checkpoints existed
         self.frontier = Frontier(cfg.frontier_file)
+        self.shared: Optional[SharedStore] = None
+        self.feed: Optional[ChangeFeed] = None
+        self.graph: Optional[LinkGraphRecorder] = None
+        self.tracer = Tracer()
+        self.templates: Optional[TemplateExtractor] = None
+        self.cache: Optional[ExtractionCache] = None
+        # perf_counter time at which traced URLs entered the queue
+        self._enqueued: Dict[str, float] = {}
+        self.sections: List[SectionConfig] = cfg.all_sections
+        # URLs of hosts whose circuit breaker is open, kept until a probe succeeds
+        self._parked: Dict[str, Deque[str]] = {}
+        self._probing: Set[str] = set()
+
+    def _section_for(self, url: str) -> Optional[SectionConfig]:
+        """Section whose allowed prefix matches ``url`` most specifically, if any."""
+        best: Optional[SectionConfig] = None
+        best_len = -1
+        for section in self.sections:
+            n = allowed_prefix_length(url, section.allow_paths)
+            if n > best_len:
+                best, best_len = section, n
+        return best
+
+    def _owns(self, url: str) -> bool:
+        return shard_for(url, self.cfg.shard_count) == self.cfg.shard_index
+
+    def _restore(self) -> None:
+        """Load the last checkpoint and roll append-only files back to it before reading any of them."""
+        self._resume = self.checkpoint.load() if self.cfg.save_frontier else None
+        if self._resume:
+            dropped = self.checkpoint.truncate_files(self._resume)
+            if dropped:
+                logging.getLogger("epfl_scraper.crawler").info(
+                    "resumed from checkpoint; dropped bytes written after it: %s", dropped
+                )
+        self.visited = VisitedSet(self.cfg.visited_file)
 
     def _seed_frontier(self) -> Deque[str]:
-        seed: List[str] = self.frontier.load() if self.cfg.save_frontier else []
+        seed: List[str] = []
+        if self._resume:
+            seed = list(self._resume.get("frontier", []))
+        elif self.cfg.save_frontier:
+            seed = self.frontier.load()
         if not seed:
-            seed = [normalize_url(u) for u in self.cfg.start_urls]
+            # Every shard gets the same seeds and keeps the ones it owns
+            seeds = (normalize_url(u) for section in self.sections for u in section.start_urls)
+            seed = [u for u in dict.fromkeys(seeds) if self._owns(u)]
         return deque(u for u in seed if u not in self.visited)
 
+    def _save_checkpoint(
+        self, queue: Deque[str], inbox_cursor: int, writers: List[JsonlWriter], completed: bool = False
+    ) -> None:
+        """Sync every append-only file, then record sizes and the frontier in one atomic write."""
+        files = self.visited.sync()
+        for w in writers:
+            files.update(w.sync())
+        may_be_absent: List[str] = []
+        if self.feed is not None:
+            feed_files = self.feed.sync()
+            files.update(feed_files)
+            may_be_absent.extend(feed_files)
+        if self.graph is not None:
+            files.update(self.graph.sync())
+        self.checkpoint.save({
+            "saved_at": iso_now(),
+            "frontier": list(queue) + [u for urls in self._parked.values() for u in urls],
+            "inbox_cursor": inbox_cursor,
+            "completed": completed,
+            "files": files,
+            "may_be_absent": may_be_absent,
+        })
+
+    def _release_parked(self, queue: Deque[str], client: PoliteHttpClient) -> Tuple[float, int]:
+        """Re-queue parked URLs whose host accepts requests again.
+
+        Returns the seconds until the next probe and the number of URLs given up
+        with their host; those are marked visited like any other skipped page.
+        """
+        logger = logging.getLogger("epfl_scraper.crawler")
+        wait = 1.0
+        given_up = 0
+        for host, urls in list(self._parked.items()):
+            state = client.breaker_state(host)
+            if state == CLOSED:
+                del self._parked[host]
+                self._probing.discard(host)
+                queue.extend(urls)
+                logger.info("re-queued %d parked URLs of %s", len(urls), host)
+            elif state == DEAD:
+                del self._parked[host]
+                self._probing.discard(host)
+                for url in urls:
+                    self.visited.add(url)
+                given_up += len(urls)
+                logger.warning("skipped %d parked URLs of unreachable host %s", len(urls), host)
+            elif state == HALF_OPEN:
+                # One URL goes out as the probe; the rest wait for its outcome
+                if host not in self._probing:
+                    if not urls:
+                        # Every parked URL went out without settling the breaker; nothing left to wait for
+                        del self._parked[host]
+                        continue
+                    self._probing.add(host)
+                    queue.appendleft(urls.popleft())
+            else:
+                self._probing.discard(host)
+                wait = min(wait, client.host(host).retry_in())
+        return wait, given_up
+
+    def _enqueue(self, queue: Deque[str], url: str) -> None:
+        queue.append(url)
+        if self.tracer.sampled(url):
+            self._enqueued[url] = time.perf_counter()
+
+    def _pull_routed(self, queue: Deque[str], seen: Set[str], cursor: int) -> int:
+        """Move links routed to this shard by the others into the local queue."""
+        assert self.shared is not None
+        urls, cursor = self.shared.pull(self.cfg.shard_index, cursor)
+        for link in urls:
+            if link not in seen and link not in self.visited:
+                self._enqueue(queue, link)
+                seen.add(link)
+        return cursor
+
     async def crawl(self) -> None:
         self.cfg.ensure_dirs()
+        if self.cfg.sharded:
+            self.shared = SharedStore(self.cfg.shared_store_file)
+        try:
+            self._restore()
+        except Exception:
+            if self.shared is not None:
+                # Peers must not wait for a shard that cannot start
+                self.shared.set_status(self.cfg.shard_index, 0, "finished", self.cfg.run_id)
+                self.shared.close()
+            raise
+        if self._resume and self._resume.get("completed"):
+            # The frontier is empty, but a shard still reports to its peers and takes
+            # the links they route to it. The change feed only publishes if pages are recorded.
+            logging.getLogger("epfl_scraper.crawler").info(
+                "crawl in %s already completed; use a fresh --state-dir to crawl again", self.cfg.state_dir
+            )
+        if self.cfg.trace_dir is not None:
+            self.tracer = Tracer(
+                self.cfg.trace_dir,
+                self.cfg.trace_sample_rate,
+                self.cfg.trace_max_events,
+                self.cfg.trace_max_files,
+            )
         queue: Deque[str] = self._seed_frontier()
-        client = PoliteHttpClient(self.cfg)
-        writer = JsonlWriter(self.cfg.output_jsonl)
+        if self.tracer.enabled:
+            now = time.perf_counter()
+            self._enqueued.update((u, now) for u in queue if self.tracer.sampled(u))
+        inbox_cursor = int(self._resume.get("inbox_cursor", 0)) if self._resume else 0
+        if self.cfg.changes_dir is not None:
+            self.feed = ChangeFeed(self.cfg.changes_dir, fresh=not self._resume)
+        if self.cfg.link_graph_dir is not None:
+            self.graph = LinkGraphRecorder(self.cfg.link_graph_dir)
+        extract = get_extractor(self.cfg.extractor)
+        # Cache entries are only reused for the extraction path that produced them
+        extractor_key = self.cfg.extractor
+        if self.cfg.learn_templates:
+            # Templates are learned from, and validated against, the selected backend
+            self.templates = TemplateExtractor(
+                self.cfg.state_dir / "templates.json", generic=extract, generic_name=self.cfg.extractor
+            )
+            extract = self.templates.extract
+            extractor_key = f"templates+{self.cfg.extractor}"
+        if self.cfg.extract_cache_mb > 0:
+            self.cache = ExtractionCache(self.cfg.extract_cache_path, self.cfg.extract_cache_mb * 1024 * 1024)
+        completed = False
+        shard_state = ""
+        status_at = 0.0
+        client = PoliteHttpClient(self.cfg, shared=self.shared, tracer=self.tracer)
+        # Sections may share an output file; open each file once
+        writers_by_path: Dict[str, JsonlWriter] = {}
+        writers: Dict[str, JsonlWriter] = {}
+        for section in self.sections:
+            key = str(section.output_jsonl)
+            if key not in writers_by_path:
+                writers_by_path[key] = JsonlWriter(section.output_jsonl)
+            writers[section.label] = writers_by_path[key]
+        if self.cfg.save_frontier:
+            # Record where outputs start so a crash before the first periodic checkpoint is recoverable
+            self._save_checkpoint(queue, inbox_cursor, list(writers_by_path.values()))
         seen: Set[str] = set(queue)
         logger = logging.getLogger("epfl_scraper.crawler")
 
@@ -59,13 +242,43 @@ class Crawler:
         try:
             pages_processed = 0
             skipped_pages = 0
-            while queue and pages_processed < self.cfg.max_pages:
+            while pages_processed < self.cfg.max_pages:
                 if stop_requested:
                     break
+                probe_wait = 0.0
+                if self._parked:
+                    probe_wait, given_up = self._release_parked(queue, client)
+                    skipped_pages += given_up
+                if self.shared is not None:
+                    inbox_cursor = self._pull_routed(queue, seen, inbox_cursor)
+                    state = "active" if queue or self._parked else "idle"
+                    # Rewritten on changes and as a heartbeat, so peers can tell a busy shard from a dead one
+                    if state != shard_state or time.monotonic() - status_at > self.cfg.shard_heartbeat_s / 4:
+                        self.shared.set_status(self.cfg.shard_index, inbox_cursor, state, self.cfg.run_id)
+                        shard_state, status_at = state, time.monotonic()
+                    if not queue and not self._parked:
+                        # Other shards may still route links here; stop once all are idle
+                        if self.shared.all_done(self.cfg.shard_count, self.cfg.run_id, self.cfg.shard_heartbeat_s):
+                            completed = True
+                            break
+                        await asyncio.sleep(self.cfg.shard_poll_s)
+                        shard_state = ""
+                        continue
+                if not queue:
+                    if self._parked:
+                        # Only paused hosts are left: wait for their next probe
+                        await asyncio.sleep(min(1.0, max(0.05, probe_wait)))
+                        continue
+                    completed = True
+                    break
                 url = queue.popleft()
+                page_start = time.perf_counter()
+                if url in self._enqueued:
+                    self.tracer.add_span("queue_wait", url, self._enqueued.pop(url), page_start)
                 if url in self.visited:
                     continue
-                if not is_epfl_domain(url) or has_disallowed_extension(url) or not is_allowed_path(url, self.cfg.allow_paths):
+                section = self._section_for(url)
+                if not is_epfl_domain(url) or has_disallowed_extension(url) or section is None:
                     self.visited.add(url)
                     skipped_pages += 1
                     # Periodic metrics
@@ -81,7 +294,13 @@ class Crawler:
                         )
                     continue
 
-                result = await client.fetch(url)
+                try:
+                    result = await client.fetch(url)
+                except CircuitOpenError as e:
+                    # Host paused: keep the URL for when its breaker lets requests through
+                    self._parked.setdefault(e.host, deque()).append(url)
+                    continue
+                self._probing.discard(client.host(url).host)
                 if result is None:
                     self.visited.add(url)
                     skipped_pages += 1
@@ -113,61 +332,129 @@ class Crawler:
                         )
                     continue
 
+                if self.feed is not None and result.status_code in (404, 410):
+                    # Error pages are not content; a known page answering this way is gone
+                    self.feed.gone(url, f"http_{result.status_code}", section.label)
+                    self.visited.add(url)
+                    skipped_pages += 1
+                    continue
+
                 text, title, lang = (None, None, None)
+                links: List[str] = []
                 if result.text:
-                    text, title, lang = extract_text(result.text, result.final_url)
+                    # Identical body at the same base URL: reuse text and links without parsing
+                    cached = None
+                    if self.cache is not None:
+                        cache_key = ExtractionCache.key(result.text, result.final_url, extractor_key)
+                        cached = self.cache.get(cache_key)
+                    if cached is not None:
+                        text, title, lang, links = cached
+                    else:
+                        with self.tracer.span("extract", url):
+                            text, title, lang = extract(result.text, result.final_url)
+                        if text:
+                            with self.tracer.span("links", url):
+                                links = extract_links(result.text, result.final_url)
+                        if self.cache is not None:
+                            self.cache.put(cache_key, text, title, lang, links)
 
                 if text:
                     checksum = sha256_text(text)
-                    save_text_mirror(self.cfg.mirror_dir, result.final_url, text)
-                    writer.write({
-                        "url": url,
-                        "canonical_url": result.final_url if result.final_url != url else None,
-                        "fetched_at": iso_now(),
-                        "status_code": result.status_code,
-                        "content_type": result.content_type,
-                        "title": title,
-                        "lang": lang,
-                        "text": text,
-                        "checksum": checksum,
-                        "section": self.cfg.section,
-                    })
-
-                    # Discover links
-                    for link in extract_links(result.text, result.final_url):
+                    change = self.feed.record(url, checksum, section.label) if self.feed is not None else None
+                    # Unchanged pages are not rewritten; their links are still followed
+                    if change != UNCHANGED:
+                        with self.tracer.span("write", url):
+                            save_text_mirror(self.cfg.mirror_dir, result.final_url, text)
+                            writers[section.label].write({
+                                "url": url,
+                                "canonical_url": result.final_url if result.final_url != url else None,
+                                "fetched_at": iso_now(),
+                                "status_code": result.status_code,
+                                "content_type": result.content_type,
+                                "title": title,
+                                "lang": lang,
+                                "text": text,
+                                "checksum": checksum,
+                                "section": section.label,
+                            })
+
+                    # Discover links; links owned by another shard are routed to it
+                    routed: List[Tuple[int, str]] = []
+                    in_scope: List[str] = []
+                    for link in links:
                         if not is_epfl_domain(link):
                             continue
                         if has_disallowed_extension(link):
                             continue
-                        if not is_allowed_path(link, self.cfg.allow_paths):
+                        if self._section_for(link) is None:
                             continue
+                        in_scope.append(link)
                         if link not in seen and link not in self.visited:
-                            queue.append(link)
                             seen.add(link)
+                            owner = shard_for(link, self.cfg.shard_count)
+                            if owner == self.cfg.shard_index:
+                                self._enqueue(queue, link)
+                            else:
+                                routed.append((owner, link))
+                    if routed and self.shared is not None:
+                        self.shared.push(routed)
+                    if self.graph is not None:
+                        self.graph.add_links(url, in_scope)
 
                 self.visited.add(url)
                 pages_processed += 1
+                self.tracer.add_span("page", url, page_start, time.perf_counter(), status=result.status_code)
 
                 # Periodic checkpoint and metrics
                 if self.cfg.save_frontier and (
                     pages_processed % max(1, self.cfg.checkpoint_every) == 0
                 ):
-                    self.frontier.save(queue)
+                    self._save_checkpoint(queue, inbox_cursor, list(writers_by_path.values()))
                     elapsed = max(1e-6, time.monotonic() - start_ts)
                     rate = pages_processed / elapsed
                     logger.info(
-                        "processed=%d rate=%.2f/s skipped=%d frontier=%d",
+                        "processed=%d rate=%.2f/s skipped=%d frontier=%d cache_hits=%d cache_misses=%d "
+                        "open_breakers=%s parked=%d",
                         pages_processed,
                         rate,
                         skipped_pages,
                         len(queue),
+                        self.cache.hits if self.cache is not None else 0,
+                        self.cache.misses if self.cache is not None else 0,
+                        ",".join(client.open_breakers()) or "-",
+                        sum(len(urls) for urls in self._parked.values()),
                     )
         finally:
             await client.close()
-            writer.close()
             # Final checkpoint on exit
             try:
                 if self.cfg.save_frontier:
-                    self.frontier.save(queue)
+                    self._save_checkpoint(queue, inbox_cursor, list(writers_by_path.values()), completed)
             except Exception:
-                pass
+                logger.exception("final checkpoint failed")
+            for w in writers_by_path.values():
+                w.close()
+            self.visited.close()
+            self.tracer.close()
+            if self.cache is not None:
+                logger.info("extraction cache: %s", self.cache.summary())
+                self.cache.close()
+            if self.templates is not None:
+                self.templates.save()
+                logger.info("templates: %s", self.templates.stats.report())
+            if self.graph is not None:
+                self.graph.close()
+            if self.feed is not None:
+                if completed:
+                    # Pages that were linked but not recorded were still reached: keep them
+                    published = self.feed.finish(lambda u: u in self.visited)
+                    if published is None:
+                        logger.warning("change feed: no page was recorded; nothing published")
+                    else:
+                        logger.info("change feed: %s -> %s", self.feed.summary(), published)
+                else:
+                    self.feed.close()
+            if self.shared is not None:
+                # A finished shard no longer holds up the others, even with unread links
+                self.shared.set_status(self.cfg.shard_index, inbox_cursor, "finished", self.cfg.run_id)
+                self.shared.close()
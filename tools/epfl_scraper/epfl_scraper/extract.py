@@ -1,12 +1,19 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import trafilatura
-from bs4 import BeautifulSoup
+# trafilatura, BeautifulSoup and lxml are imported where used, so importing this
+# module (and the CLI) stays cheap
+
+ExtractResult = Tuple[Optional[str], Optional[str], Optional[str]]
+
+BLOCK_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6", "p", "li")
+DROP_TAGS = ("script", "style", "noscript", "header", "footer", "nav", "form")
 
 
 def extract_with_trafilatura(html: str, url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    import trafilatura
+
     text = trafilatura.extract(
         html,
         url=url,
@@ -23,6 +30,8 @@ def extract_with_trafilatura(html: str, url: str) -> Tuple[Optional[str], Option
 
 
 def fallback_extract(html: str) -> Tuple[Optional[str], Optional[str]]:
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "lxml")
     title_tag = soup.find("title")
     title = title_tag.get_text(strip=True) if title_tag else None
@@ -50,3 +59,57 @@ def extract_text(html: str, url: str) -> tuple[Optional[str], Optional[str], Opt
     # Fallback
     fb_text, fb_title = fallback_extract(html)
     return fb_text, fb_title, lang
+
+
+def block_text(region: Any) -> Optional[str]:
+    """Headings, paragraphs and list items of an lxml element, one per line, outside dropped tags."""
+    chunks: List[str] = []
+    for el in region.iter(*BLOCK_TAGS):
+        if any(a.tag in DROP_TAGS for a in el.iterancestors()):
+            continue
+        # Nested blocks (p inside li) are covered by their outermost block
+        if any(a.tag in BLOCK_TAGS for a in el.iterancestors() if a is not region):
+            continue
+        text = " ".join(el.text_content().split())
+        if text:
+            chunks.append(text)
+    return "\n".join(chunks) if chunks else None
+
+
+def extract_lxml_fast(html: str, url: str) -> ExtractResult:
+    """Plain lxml pass over ``<main>``/``<article>`` (or ``<body>``); no boilerplate heuristics."""
+    from lxml import html as lxml_html
+
+    try:
+        tree = lxml_html.fromstring(html)
+    except Exception:
+        return None, None, None
+    region = next(iter(tree.xpath("//main|//article")), None)
+    if region is None:
+        region = tree.find(".//body")
+    title_el = tree.find(".//title")
+    title = " ".join(title_el.text_content().split()) if title_el is not None else None
+    lang = tree.get("lang")
+    if lang:
+        lang = lang.split("-")[0].lower()
+    return block_text(region if region is not None else tree), title or None, lang or None
+
+
+def extract_bs4(html: str, url: str) -> ExtractResult:
+    text, title = fallback_extract(html)
+    return text, title, None
+
+
+# Extractor backends selectable with ``--extractor``
+EXTRACTORS: Dict[str, Callable[[str, str], ExtractResult]] = {
+    "trafilatura": extract_text,
+    "lxml-fast": extract_lxml_fast,
+    "bs4": extract_bs4,
+}
+
+
+def get_extractor(name: str) -> Callable[[str, str], ExtractResult]:
+    try:
+        return EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"unknown extractor {name!r}; choose from {', '.join(EXTRACTORS)}") from None
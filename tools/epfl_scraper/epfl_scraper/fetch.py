@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 import random
 import time
+from collections import deque
 from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional
 from urllib.parse import urlparse
 
 import httpx
@@ -12,6 +14,21 @@ from httpx import Response
 from urllib import robotparser
 
 from .config import ScraperConfig
+from .tracing import Tracer
+
+if TYPE_CHECKING:
+    from .sharding import SharedStore
+
+logger = logging.getLogger("epfl_scraper.fetch")
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+DEAD = "dead"  # too many failed probes; the host is given up for this crawl
+
+# Responses counted as host failures, like transport errors and timeouts
+FAILURE_STATUSES = (500, 502, 503, 504)
 
 
 @dataclass
@@ -50,45 +67,186 @@ class RobotsCache:
             return True
 
 
+class CircuitOpenError(Exception):
+    """Raised by ``fetch`` instead of requesting a host whose breaker is not closed."""
+
+    def __init__(self, host: str, state: str, retry_in: float) -> None:
+        super().__init__(f"circuit {state} for {host}")
+        self.host = host
+        self.state = state
+        self.retry_in = retry_in
+
+
+class HostHealth:
+    """Latency window and circuit breaker of one host.
+
+    ``breaker_failures`` consecutive failures open the breaker. Once the cooldown
+    has passed it is half-open and admits one probe request: success closes it,
+    failure re-opens it with twice the cooldown (up to ``breaker_max_cooldown_s``).
+    After ``breaker_max_probes`` failed probes in a row the host is given up.
+    """
+
+    def __init__(self, host: str, cfg: ScraperConfig) -> None:
+        self.host = host
+        self.cfg = cfg
+        self.latencies: Deque[float] = deque(maxlen=cfg.latency_window)
+        self.state = CLOSED
+        self.failures = 0
+        self.failed_probes = 0
+        self.cooldown = cfg.breaker_cooldown_s
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def timeout(self) -> float:
+        """``timeout_multiplier`` x the latency percentile, within [min_timeout_s, request_timeout_s]."""
+        cfg = self.cfg
+        if not cfg.adaptive_timeouts or len(self.latencies) < cfg.latency_min_samples:
+            return cfg.request_timeout_s
+        ordered = sorted(self.latencies)
+        p = ordered[min(len(ordered) - 1, int(cfg.timeout_percentile * len(ordered)))]
+        return min(cfg.request_timeout_s, max(cfg.min_timeout_s, p * cfg.timeout_multiplier))
+
+    def current_state(self) -> str:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            logger.info("circuit half-open for %s; next request is a probe", self.host)
+        return self.state
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        state = self.current_state()
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.failures = 0
+        if self.state != CLOSED:
+            logger.info("circuit closed for %s; probe succeeded in %.2fs", self.host, latency)
+            self.state = CLOSED
+            self.failed_probes = 0
+            self.cooldown = self.cfg.breaker_cooldown_s
+        self.probe_in_flight = False
+
+    def failure(self, reason: str) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = False
+            self.failed_probes += 1
+            if self.failed_probes >= self.cfg.breaker_max_probes:
+                self.state = DEAD
+                logger.warning("circuit for %s given up after %d failed probes (%s)", self.host, self.failed_probes, reason)
+                return
+            self.cooldown = min(self.cooldown * 2, self.cfg.breaker_max_cooldown_s)
+            self._open(reason)
+        elif self.state == CLOSED and self.failures >= self.cfg.breaker_failures:
+            self._open(reason)
+
+    def _open(self, reason: str) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        logger.warning(
+            "circuit open for %s after %d failures (%s); retry in %.0fs", self.host, self.failures, reason, self.cooldown
+        )
+
+
 class PoliteHttpClient:
-    def __init__(self, cfg: ScraperConfig) -> None:
+    def __init__(
+        self,
+        cfg: ScraperConfig,
+        shared: Optional["SharedStore"] = None,
+        tracer: Optional[Tracer] = None,
+    ) -> None:
         self.cfg = cfg
+        # When set, request slots per host are booked in the store shared by all shards
+        self._shared = shared
+        self._tracer = tracer or Tracer()
         self._client = httpx.AsyncClient(timeout=cfg.request_timeout_s, headers={"User-Agent": cfg.user_agent})
         self._robots = RobotsCache()
         self._last_request_ts: float = 0.0
+        self._hosts: Dict[str, HostHealth] = {}
 
     async def close(self) -> None:
         await self._client.aclose()
 
-    async def _respect_rate_limit(self) -> None:
+    def host(self, url_or_host: str) -> HostHealth:
+        host = urlparse(url_or_host).netloc if "://" in url_or_host else url_or_host
+        health = self._hosts.get(host)
+        if health is None:
+            health = self._hosts[host] = HostHealth(host, self.cfg)
+        return health
+
+    def breaker_state(self, host: str) -> str:
+        return self.host(host).current_state()
+
+    def open_breakers(self) -> List[str]:
+        return sorted(h.host for h in self._hosts.values() if h.current_state() != CLOSED)
+
+    async def _respect_rate_limit(self, url: Optional[str] = None) -> None:
         min_interval = 1.0 / max(self.cfg.rate_per_sec, 0.001)
-        now = time.monotonic()
-        elapsed = now - self._last_request_ts
-        if elapsed < min_interval:
-            await asyncio.sleep(min_interval - elapsed)
+        if self._shared is not None and url is not None:
+            wait = self._shared.reserve_slot(urlparse(url).netloc, min_interval)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        else:
+            now = time.monotonic()
+            elapsed = now - self._last_request_ts
+            if elapsed < min_interval:
+                await asyncio.sleep(min_interval - elapsed)
         # Apply small jitter once, after interval enforcement to avoid compounding delays
         if self.cfg.jitter_s > 0:
             await asyncio.sleep(random.uniform(0, self.cfg.jitter_s))
 
     async def fetch(self, url: str) -> Optional[FetchResult]:
-        if self.cfg.obey_robots and not self._robots.allowed(self.cfg.user_agent, url):
-            return None
+        """Fetch ``url``; None when it cannot be fetched, ``CircuitOpenError`` when its host is unavailable."""
+        tracer = self._tracer
+        health = self.host(url)
+        if not health.allow():
+            raise CircuitOpenError(health.host, health.state, health.retry_in())
+        if self.cfg.obey_robots:
+            with tracer.span("robots", url):
+                allowed = self._robots.allowed(self.cfg.user_agent, url)
+            if not allowed:
+                # No request was made; hand the probe slot back
+                health.probe_in_flight = False
+                return None
 
         attempts = 0
         backoff = self.cfg.backoff_base_s
+        hook = tracer.http_hook(url)
+        extensions = {"trace": hook} if hook else None
 
         while attempts < self.cfg.max_retries:
-            await self._respect_rate_limit()
+            with tracer.span("rate_limit", url, attempt=attempts):
+                await self._respect_rate_limit(url)
             try:
-                resp: Response = await self._client.get(url, follow_redirects=True)
+                timeout = health.timeout()
+                started = time.perf_counter()
+                with tracer.span("request", url, attempt=attempts, timeout=round(timeout, 2)):
+                    resp: Response = await self._client.get(
+                        url, follow_redirects=True, extensions=extensions, timeout=timeout
+                    )
                 self._last_request_ts = time.monotonic()
                 status = resp.status_code
+                if status in FAILURE_STATUSES:
+                    health.failure(f"http_{status}")
+                else:
+                    health.success(time.perf_counter() - started)
                 ctype = resp.headers.get("content-type")
 
                 text: Optional[str] = None
                 if resp.content and len(resp.content) <= self.cfg.max_content_bytes:
                     # Prefer response.text to decode using charset
-                    text = resp.text
+                    with tracer.span("decode", url, bytes=len(resp.content)):
+                        text = resp.text
 
                 return FetchResult(
                     url=url,
@@ -105,11 +263,18 @@ class PoliteHttpClient:
                     attempts += 1
                     continue
                 raise
-            except (httpx.ConnectError, httpx.ReadTimeout, httpx.RemoteProtocolError):
+            except (httpx.ConnectError, httpx.TimeoutException, httpx.RemoteProtocolError) as e:
+                health.failure(type(e).__name__)
+                if not health.allow():
+                    # The breaker opened: park the URL rather than keep hammering the host
+                    raise CircuitOpenError(health.host, health.state, health.retry_in()) from e
                 await asyncio.sleep(backoff + random.uniform(0, self.cfg.jitter_s))
                 backoff *= 2
                 attempts += 1
-            except Exception:
-                # Non-retryable
+            except Exception as e:
+                # Non-retryable. A probe must still settle the breaker, or the host stays half-open
+                if health.state == HALF_OPEN:
+                    health.failure(type(e).__name__)
+                health.probe_in_flight = False
                 return None
         return None
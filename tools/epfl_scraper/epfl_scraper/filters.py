@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from typing import Iterable, List, Optional, Set
 from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
-from bs4 import BeautifulSoup
 
 # Extensions to block (non-HTML). Keep PDFs excluded per scope.
 DISALLOWED_EXTENSIONS: Set[str] = {
@@ -47,15 +46,21 @@ def has_disallowed_extension(url: str) -> bool:
 
 
 def is_allowed_path(url: str, allow_paths: Iterable[str]) -> bool:
+    return allowed_prefix_length(url, allow_paths) >= 0
+
+
+def allowed_prefix_length(url: str, allow_paths: Iterable[str]) -> int:
+    """Length of the longest allowed prefix matching the URL path, or -1 if none does."""
     path = urlparse(url).path or "/"
+    best = -1
     for prefix in allow_paths:
         if not prefix:
             continue
         if not prefix.startswith("/"):
             prefix = "/" + prefix
         if path.startswith(prefix):
-            return True
-    return False
+            best = max(best, len(prefix))
+    return best
 
 
 def is_html_like_content_type(content_type: Optional[str]) -> bool:
@@ -76,6 +81,8 @@ def resolve_link(base_url: str, href: Optional[str]) -> Optional[str]:
 
 
 def extract_links(html: str, base_url: str) -> List[str]:
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "lxml")
     links: List[str] = []
     for a in soup.find_all("a"):
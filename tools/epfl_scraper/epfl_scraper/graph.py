@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+NODES_FILE = "nodes.txt"
+EDGES_FILE = "edges.bin"
+
+
+class LinkGraphRecorder:
+    """Append-only record of the link graph seen during a crawl.
+
+    URLs are interned to ids in order of first appearance (``nodes.txt``, one URL
+    per line) and every edge is appended to ``edges.bin`` as a pair of uint32.
+    Both files only grow, so they are checkpointed like the outputs.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        root.mkdir(parents=True, exist_ok=True)
+        self.nodes_path = root / NODES_FILE
+        self.edges_path = root / EDGES_FILE
+        self._ids: Dict[str, int] = {}
+        if self.nodes_path.exists():
+            for line in self.nodes_path.read_text(encoding="utf-8").splitlines():
+                self._ids.setdefault(line, len(self._ids))
+        self._nodes = self.nodes_path.open("a", encoding="utf-8")
+        self._edges = self.edges_path.open("ab")
+
+    def intern(self, url: str) -> int:
+        node = self._ids.get(url)
+        if node is None:
+            node = len(self._ids)
+            self._ids[url] = node
+            self._nodes.write(url + "\n")
+        return node
+
+    def add_links(self, src: str, targets: Iterable[str]) -> None:
+        s = self.intern(src)
+        pairs = array("I")
+        for t in dict.fromkeys(targets):
+            pairs.append(s)
+            pairs.append(self.intern(t))
+        if pairs:
+            # Nodes first, so every id in edges.bin is already in nodes.txt on disk
+            self._nodes.flush()
+            pairs.tofile(self._edges)
+            self._edges.flush()
+
+    def sync(self) -> Dict[str, int]:
+        sizes: Dict[str, int] = {}
+        for path, fh in ((self.nodes_path, self._nodes), (self.edges_path, self._edges)):
+            fh.flush()
+            os.fsync(fh.fileno())
+            sizes[str(path)] = fh.tell()
+        return sizes
+
+    def close(self) -> None:
+        self._nodes.close()
+        self._edges.close()
+
+
+def build_csr(sources: Sequence[Path], out: Path) -> Dict[str, int]:
+    """Turn recorder directories (one per shard, or just one) into a CSR graph in ``out``.
+
+    Writes ``nodes.txt`` (sorted; a node's id is its line number), ``offsets.bin``
+    (uint64, n+1 entries), ``targets.bin`` (uint32, sorted per row, duplicate
+    edges removed) and ``meta.json``. Local ids are mapped to global ones by
+    binary search in the sorted URL list, without a URL -> id dict.
+    """
+    out.mkdir(parents=True, exist_ok=True)
+    merged: List[str] = []
+    for root in sources:
+        merged.extend((root / NODES_FILE).read_text(encoding="utf-8").splitlines())
+    merged.sort()
+    urls: List[str] = []
+    for u in merged:
+        if not urls or urls[-1] != u:
+            urls.append(u)
+    del merged
+    src_all = array("I")
+    dst_all = array("I")
+    for root in sources:
+        lines = (root / NODES_FILE).read_text(encoding="utf-8").splitlines()
+        local = array("I", (bisect_left(urls, line) for line in lines))
+        del lines
+        edges = array("I")
+        with (root / EDGES_FILE).open("rb") as fh:
+            edges.frombytes(fh.read())
+        for i in range(0, len(edges) - 1, 2):
+            src_all.append(local[edges[i]])
+            dst_all.append(local[edges[i + 1]])
+
+    n = len(urls)
+    # Counting sort by source, then sort and dedup each row
+    counts = array("Q", bytes(8 * (n + 1)))
+    for s in src_all:
+        counts[s + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    fill = array("Q", counts)
+    targets = array("I", bytes(4 * len(dst_all)))
+    for s, d in zip(src_all, dst_all):
+        targets[fill[s]] = d
+        fill[s] += 1
+
+    offsets = array("Q", [0])
+    packed = array("I")
+    for u in range(n):
+        row = sorted(set(targets[counts[u]:counts[u + 1]]))
+        packed.extend(row)
+        offsets.append(len(packed))
+
+    (out / NODES_FILE).write_text("".join(u + "\n" for u in urls), encoding="utf-8")
+    with (out / "offsets.bin").open("wb") as fh:
+        offsets.tofile(fh)
+    with (out / "targets.bin").open("wb") as fh:
+        packed.tofile(fh)
+    meta = {"n_nodes": n, "n_edges": len(packed)}
+    (out / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    return meta
+
+
+class CsrGraph:
+    """Memory-mapped CSR adjacency written by ``build_csr``; URLs are only read on demand."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        meta = json.loads((root / "meta.json").read_text(encoding="utf-8"))
+        self.n_nodes: int = meta["n_nodes"]
+        self.n_edges: int = meta["n_edges"]
+        self._maps: List[Any] = []
+        self.offsets = self._map("offsets.bin", "Q")
+        self.targets = self._map("targets.bin", "I")
+
+    def _map(self, name: str, fmt: str) -> Any:
+        path = self.root / name
+        if path.stat().st_size == 0:
+            return memoryview(array(fmt))
+        with path.open("rb") as fh:
+            m = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(m)
+        return memoryview(m).cast(fmt)
+
+    def neighbors(self, node: int) -> Any:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def out_degree(self, node: int) -> int:
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def urls(self) -> List[str]:
+        return (self.root / NODES_FILE).read_text(encoding="utf-8").splitlines()
+
+    @staticmethod
+    def node(urls: Sequence[str], url: str) -> Optional[int]:
+        """Id of ``url`` in the sorted ``urls()`` list, or None if it is not a node."""
+        i = bisect_left(urls, url)
+        return i if i < len(urls) and urls[i] == url else None
+
+    def close(self) -> None:
+        self.offsets.release()
+        self.targets.release()
+        for m in self._maps:
+            m.close()
+
+    def __enter__(self) -> "CsrGraph":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def in_degree(g: CsrGraph) -> array:
+    deg = array("I", bytes(4 * g.n_nodes))
+    for v in g.targets:
+        deg[v] += 1
+    return deg
+
+
+def crawl_depth(g: CsrGraph, seeds: Iterable[int]) -> array:
+    """BFS distance from the seeds; -1 for nodes they do not reach."""
+    depth = array("i", [-1]) * g.n_nodes
+    queue = deque()
+    for s in seeds:
+        if depth[s] < 0:
+            depth[s] = 0
+            queue.append(s)
+    while queue:
+        u = queue.popleft()
+        for v in g.neighbors(u):
+            if depth[v] < 0:
+                depth[v] = depth[u] + 1
+                queue.append(v)
+    return depth
+
+
+def pagerank(g: CsrGraph, damping: float = 0.85, max_iter: int = 50, tol: float = 1e-6) -> array:
+    """Power iteration; the rank of pages without out-links is spread uniformly."""
+    n = g.n_nodes
+    if n == 0:
+        return array("d")
+    rank = array("d", [1.0 / n]) * n
+    offsets, targets = g.offsets, g.targets
+    for _ in range(max_iter):
+        nxt = array("d", bytes(8 * n))
+        dangling = 0.0
+        for u in range(n):
+            start, end = offsets[u], offsets[u + 1]
+            if start == end:
+                dangling += rank[u]
+                continue
+            share = rank[u] / (end - start)
+            for v in targets[start:end]:
+                nxt[v] += share
+        base = (1.0 - damping) / n + damping * dangling / n
+        delta = 0.0
+        for v in range(n):
+            value = base + damping * nxt[v]
+            delta += abs(value - rank[v])
+            nxt[v] = value
+        rank = nxt
+        if delta < tol:
+            break
+    return rank
+
+
+def _first_recorded(root: Path) -> List[str]:
+    """First URL the crawler recorded (usually its start page), as the default seed."""
+    with (root / NODES_FILE).open(encoding="utf-8") as fh:
+        first = fh.readline().rstrip("\n")
+    return [first] if first else []
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build a CSR link graph and compute in-degree, crawl depth and PageRank")
+    parser.add_argument("sources", nargs="+", type=Path, help="Link graph directories written by the crawler (--link-graph)")
+    parser.add_argument("--out", type=Path, default=None, help="CSR output directory (default: <first source>/csr)")
+    parser.add_argument("--seeds", nargs="*", default=None, help="Seed URLs for crawl depth (default: first recorded URL)")
+    parser.add_argument("--metrics", type=Path, default=None, help="Write per-URL metrics as JSONL")
+    parser.add_argument("--top", type=int, default=20, help="Print the top-N pages by PageRank")
+    args = parser.parse_args(argv)
+
+    out = args.out or args.sources[0] / "csr"
+    meta = build_csr(args.sources, out)
+    print(f"[graph] nodes={meta['n_nodes']} edges={meta['n_edges']} -> {out}")
+    with CsrGraph(out) as g:
+        urls = g.urls()
+        seed_urls = args.seeds or _first_recorded(args.sources[0])
+        seeds = [i for i in (CsrGraph.node(urls, u) for u in seed_urls) if i is not None]
+        indeg, depth, pr = in_degree(g), crawl_depth(g, seeds), pagerank(g)
+        if args.metrics:
+            with args.metrics.open("w", encoding="utf-8") as fh:
+                for i, u in enumerate(urls):
+                    fh.write(json.dumps({"url": u, "in_degree": indeg[i], "depth": depth[i], "pagerank": pr[i]}) + "\n")
+        for i in sorted(range(g.n_nodes), key=lambda i: pr[i], reverse=True)[:args.top]:
+            print(f"{pr[i]:.5f}  in={indeg[i]:<5d} depth={depth[i]:<3d} {urls[i]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import time
+import unicodedata
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Merge every segment into one once an index grows past this many segments
+MAX_SEGMENTS = 8
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    # English
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with you your "
+    "we our can not all any more may also which who"
+    # French
+    " au aux avec ce ces dans de des du elle en est et il ils je la le les leur lui ma mais me meme mes moi mon ne nos "
+    "notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous sont ete etre "
+    "cette cet plus peut".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenizer shared by FR and EN: accent folding, stopwords and a light plural strip.
+
+    ``étudiants``, ``etudiant`` and ``Étudiant`` all map to ``etudiant``.
+    """
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    out: List[str] = []
+    for tok in _TOKEN.findall(folded):
+        if len(tok) < 2 or tok in STOPWORDS:
+            continue
+        if len(tok) > 4 and tok[-1] in "sx" and not tok.endswith("ss"):
+            tok = tok[:-1]
+        out.append(tok)
+    return out
+
+
+# ---------- varint postings ----------
+
+def encode_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(buf: Any, start: int, end: int) -> Iterator[int]:
+    value = 0
+    shift = 0
+    for i in range(start, end):
+        byte = buf[i]
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield value
+            value = 0
+            shift = 0
+
+
+def encode_postings(postings: Sequence[Tuple[int, int]]) -> bytes:
+    """Encode sorted ``(doc_id, tf)`` pairs as delta-coded varints."""
+    out = bytearray()
+    prev = 0
+    for doc_id, tf in postings:
+        encode_varint(doc_id - prev, out)
+        encode_varint(tf, out)
+        prev = doc_id
+    return bytes(out)
+
+
+def decode_postings(buf: Any, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    it = decode_varints(buf, start, end)
+    doc_id = 0
+    for delta in it:
+        doc_id += delta
+        yield doc_id, next(it)
+
+
+# ---------- segments ----------
+
+@dataclass
+class _SegmentData:
+    docs: List[Dict[str, Any]]
+    doc_lens: List[int]
+    postings: Dict[str, List[Tuple[int, int]]]
+
+
+def _write_segment(path: Path, data: _SegmentData) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.mkdir(parents=True, exist_ok=True)
+
+    lexicon: Dict[str, List[int]] = {}
+    with (tmp / "postings.bin").open("wb") as fh:
+        offset = 0
+        for term in sorted(data.postings):
+            blob = encode_postings(data.postings[term])
+            fh.write(blob)
+            lexicon[term] = [offset, len(blob), len(data.postings[term])]
+            offset += len(blob)
+
+    offsets = array("Q", [0])
+    with (tmp / "docs.bin").open("wb") as fh:
+        for doc in data.docs:
+            blob = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+            fh.write(blob)
+            offsets.append(offsets[-1] + len(blob))
+    with (tmp / "docs.idx").open("wb") as fh:
+        offsets.tofile(fh)
+    with (tmp / "doclens.bin").open("wb") as fh:
+        array("I", data.doc_lens).tofile(fh)
+
+    (tmp / "lexicon.json").write_text(json.dumps(lexicon, separators=(",", ":")), encoding="utf-8")
+    (tmp / "ids.json").write_text(json.dumps([doc.get("id") for doc in data.docs]), encoding="utf-8")
+    meta = {"n_docs": len(data.docs), "total_len": sum(data.doc_lens)}
+    (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _mmap_file(path: Path) -> Any:
+    if path.stat().st_size == 0:
+        return b""
+    with path.open("rb") as fh:
+        return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Segment:
+    """Read-only view over one on-disk segment; postings and docs are memory-mapped."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        self.n_docs: int = meta["n_docs"]
+        self.total_len: int = meta["total_len"]
+        self.lexicon: Dict[str, List[int]] = json.loads((path / "lexicon.json").read_text(encoding="utf-8"))
+        self.ids: List[Optional[str]] = json.loads((path / "ids.json").read_text(encoding="utf-8"))
+        self._maps = [_mmap_file(path / name) for name in ("postings.bin", "docs.bin", "docs.idx", "doclens.bin")]
+        self._postings, self._docs = self._maps[0], self._maps[1]
+        self._doc_offsets = memoryview(self._maps[2]).cast("Q")
+        self._doc_lens = memoryview(self._maps[3]).cast("I")
+
+    def df(self, term: str) -> int:
+        entry = self.lexicon.get(term)
+        return entry[2] if entry else 0
+
+    def postings(self, term: str) -> Iterator[Tuple[int, int]]:
+        entry = self.lexicon.get(term)
+        if not entry:
+            return iter(())
+        offset, length, _ = entry
+        return decode_postings(self._postings, offset, offset + length)
+
+    def doc_len(self, doc_id: int) -> int:
+        return self._doc_lens[doc_id]
+
+    def doc(self, doc_id: int) -> Dict[str, Any]:
+        start, end = self._doc_offsets[doc_id], self._doc_offsets[doc_id + 1]
+        return json.loads(bytes(self._docs[start:end]).decode("utf-8"))
+
+    def close(self) -> None:
+        self._doc_offsets.release()
+        self._doc_lens.release()
+        for m in self._maps:
+            if isinstance(m, mmap.mmap):
+                m.close()
+
+
+def _live_docs(segments: Sequence[Segment]) -> List[Tuple[int, int]]:
+    """``(segment, doc)`` pairs not superseded by the same chunk id in a newer segment."""
+    live: List[Tuple[int, int]] = []
+    seen_ids = set()
+    for s_idx in range(len(segments) - 1, -1, -1):
+        seg = segments[s_idx]
+        for d in range(seg.n_docs - 1, -1, -1):
+            doc_key = seg.ids[d]
+            if doc_key is not None:
+                if doc_key in seen_ids:
+                    continue
+                seen_ids.add(doc_key)
+            live.append((s_idx, d))
+    live.reverse()
+    return live
+
+
+# ---------- index directory ----------
+
+def _load_manifest(root: Path) -> Dict[str, Any]:
+    path = root / "manifest.json"
+    if not path.exists():
+        return {"segments": [], "next": 1}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save_manifest(root: Path, manifest: Dict[str, Any]) -> None:
+    tmp = root / "manifest.json.tmp"
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp, root / "manifest.json")
+
+
+class LocalIndexWriter:
+    """Buffers chunks and writes them as immutable segments under ``root``.
+
+    Chunks use the same shape as the ones uploaded by ``index_texts.py``
+    (``id``, ``text``, ``title``, ``url``, ``payload``). A chunk id written again
+    in a later segment replaces the older copy. ``flush(replace_all=True)``
+    publishes the buffer as the whole index, for callers that re-read the full
+    corpus, so chunks of removed or changed pages do not linger.
+    """
+
+    def __init__(self, root: Path, max_segments: int = MAX_SEGMENTS) -> None:
+        self.root = root
+        self.max_segments = max_segments
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._docs: List[Dict[str, Any]] = []
+
+    def add(self, chunks: Iterable[Dict[str, Any]]) -> None:
+        self._docs.extend(chunks)
+
+    def flush(self, replace_all: bool = False) -> Optional[Path]:
+        if not self._docs and not replace_all:
+            return None
+        data = _SegmentData(docs=[], doc_lens=[], postings=defaultdict(list))
+        for doc_id, doc in enumerate(self._docs):
+            terms = tokenize(f"{doc.get('title') or ''} {doc.get('text') or ''}")
+            tf: Dict[str, int] = defaultdict(int)
+            for t in terms:
+                tf[t] += 1
+            for t, n in tf.items():
+                data.postings[t].append((doc_id, n))
+            data.docs.append(doc)
+            data.doc_lens.append(len(terms))
+        self._docs = []
+
+        manifest = _load_manifest(self.root)
+        name = f"seg-{manifest['next']:06d}"
+        _write_segment(self.root / name, data)
+        if replace_all:
+            old_names = manifest["segments"]
+            _save_manifest(self.root, {"segments": [name], "next": manifest["next"] + 1})
+            for old in old_names:
+                _remove_tree(self.root / old)
+            return self.root / name
+        manifest["segments"].append(name)
+        manifest["next"] += 1
+        _save_manifest(self.root, manifest)
+
+        if len(manifest["segments"]) > self.max_segments:
+            self.merge()
+        return self.root / name
+
+    def merge(self) -> None:
+        """Rewrite all segments as a single one, dropping chunk ids superseded by newer segments."""
+        manifest = _load_manifest(self.root)
+        names: List[str] = list(manifest["segments"])
+        if len(names) < 2:
+            return
+        segments = [Segment(self.root / n) for n in names]
+        try:
+            keep = _live_docs(segments)
+            remap: Dict[Tuple[int, int], int] = {key: new_id for new_id, key in enumerate(keep)}
+
+            data = _SegmentData(docs=[], doc_lens=[], postings=defaultdict(list))
+            for s_idx, d in keep:
+                data.docs.append(segments[s_idx].doc(d))
+                data.doc_lens.append(segments[s_idx].doc_len(d))
+            terms = sorted({t for seg in segments for t in seg.lexicon})
+            for term in terms:
+                merged: List[Tuple[int, int]] = []
+                for s_idx, seg in enumerate(segments):
+                    for d, tf in seg.postings(term):
+                        new_id = remap.get((s_idx, d))
+                        if new_id is not None:
+                            merged.append((new_id, tf))
+                if merged:
+                    merged.sort()
+                    data.postings[term] = merged
+        finally:
+            for seg in segments:
+                seg.close()
+
+        name = f"seg-{manifest['next']:06d}"
+        _write_segment(self.root / name, data)
+        _save_manifest(self.root, {"segments": [name], "next": manifest["next"] + 1})
+        for old in names:
+            _remove_tree(self.root / old)
+
+
+def _remove_tree(path: Path) -> None:
+    if not path.exists():
+        return
+    for child in path.iterdir():
+        child.unlink()
+    path.rmdir()
+
+
+@dataclass
+class SearchHit:
+    score: float
+    chunk: Dict[str, Any]
+
+
+class LocalIndex:
+    """BM25 search over every segment listed in the manifest of ``root``."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        names = _load_manifest(root)["segments"]
+        self.segments = [Segment(root / n) for n in names]
+        self.n_docs = sum(s.n_docs for s in self.segments)
+        total = sum(s.total_len for s in self.segments)
+        # Chunks rewritten in a newer segment stay on disk until the next merge;
+        # they are left out of the collection statistics as well as the results
+        self._superseded = set()
+        if len(self.segments) > 1:
+            live = set(_live_docs(self.segments))
+            self._superseded = {
+                (s_idx, d) for s_idx, seg in enumerate(self.segments) for d in range(seg.n_docs)
+            } - live
+            self.n_docs -= len(self._superseded)
+            total -= sum(self.segments[s_idx].doc_len(d) for s_idx, d in self._superseded)
+        self.avgdl = (total / self.n_docs) if self.n_docs else 0.0
+
+    def close(self) -> None:
+        for seg in self.segments:
+            seg.close()
+
+    def __enter__(self) -> "LocalIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def search(self, query: str, k: int = 10) -> List[SearchHit]:
+        terms = set(tokenize(query))
+        if not terms or not self.n_docs:
+            return []
+        scores: Dict[Tuple[int, int], float] = defaultdict(float)
+        for term in terms:
+            if self._superseded:
+                matches = [
+                    (s_idx, d, tf)
+                    for s_idx, seg in enumerate(self.segments)
+                    for d, tf in seg.postings(term)
+                    if (s_idx, d) not in self._superseded
+                ]
+            else:
+                matches = [(s_idx, d, tf) for s_idx, seg in enumerate(self.segments) for d, tf in seg.postings(term)]
+            df = len(matches)
+            if not df:
+                continue
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            for s_idx, d, tf in matches:
+                norm = K1 * (1 - B + B * self.segments[s_idx].doc_len(d) / self.avgdl)
+                scores[(s_idx, d)] += idf * tf * (K1 + 1) / (tf + norm)
+
+        ranked = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [SearchHit(score=score, chunk=self.segments[s_idx].doc(d)) for (s_idx, d), score in ranked]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query a local BM25 index built by index_texts.py --local-index")
+    parser.add_argument("index_dir", type=Path, help="Local index directory")
+    parser.add_argument("query", help="Query text")
+    parser.add_argument("-k", dest="k", type=int, default=5, help="Number of chunks to return")
+    parser.add_argument("--merge", action="store_true", help="Merge all segments before querying")
+    args = parser.parse_args(argv)
+
+    if args.merge:
+        LocalIndexWriter(args.index_dir).merge()
+    with LocalIndex(args.index_dir) as index:
+        start = time.perf_counter()
+        hits = index.search(args.query, k=args.k)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for rank, hit in enumerate(hits, 1):
+            snippet = (hit.chunk.get("text") or "")[:160].replace("\n", " ")
+            print(f"{rank:2d}. {hit.score:6.2f}  {hit.chunk.get('url') or '-'}\n    {snippet}")
+        print(f"[{len(hits)} hits in {elapsed_ms:.1f} ms over {index.n_docs} chunks]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, List, Sequence, Set, Tuple
+
+from .storage import JsonlRecordStore, JsonlWriter, index_path_for
+
+logger = logging.getLogger("epfl_scraper.sharding")
+
+
+def shard_for(url: str, count: int) -> int:
+    """Owner shard of a normalized URL (stable across processes and machines)."""
+    if count <= 1:
+        return 0
+    digest = hashlib.sha1(url.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def shard_path(path: Path, index: int, count: int) -> Path:
+    """``data/out.jsonl`` -> ``data/out.shard-01-of-04.jsonl``."""
+    return path.with_name(f"{path.stem}.shard-{index:02d}-of-{count:02d}{path.suffix}")
+
+
+class SharedStore:
+    """SQLite stand-in for the queue and politeness state shared by all shards.
+
+    - ``links``: URLs discovered by one shard and owned by another. Each shard
+      reads its rows in id order and remembers the last id it consumed.
+    - ``hosts``: next wall-clock time a request to a host may start, so the
+      per-host rate holds across every process using the store.
+    - ``shards``: per-shard status used to decide when the whole crawl is over,
+      tagged with the run id shared by all shards of one crawl.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._opened = time.time()
+        # Shards already reported as dead by all_done
+        self._dead: Set[int] = set()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30.0, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS links (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                shard INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                UNIQUE (shard, url)
+            );
+            CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, next_ts REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS shards (
+                shard INTEGER PRIMARY KEY,
+                cursor INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                updated REAL NOT NULL,
+                run TEXT NOT NULL DEFAULT ''
+            );
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(shards)")}
+        if "run" not in columns:
+            # Store created before run ids existed
+            self._db.execute("ALTER TABLE shards ADD COLUMN run TEXT NOT NULL DEFAULT ''")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def push(self, links: Iterable[Tuple[int, str]]) -> None:
+        rows = list(links)
+        if rows:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany("INSERT OR IGNORE INTO links (shard, url) VALUES (?, ?)", rows)
+            self._db.execute("COMMIT")
+
+    def pull(self, shard: int, after_id: int, limit: int = 1000) -> Tuple[List[str], int]:
+        rows = self._db.execute(
+            "SELECT id, url FROM links WHERE shard = ? AND id > ? ORDER BY id LIMIT ?",
+            (shard, after_id, limit),
+        ).fetchall()
+        if not rows:
+            return [], after_id
+        return [url for _, url in rows], rows[-1][0]
+
+    def reserve_slot(self, host: str, min_interval: float) -> float:
+        """Book the next request slot for ``host`` and return how long to wait for it."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT next_ts FROM hosts WHERE host = ?", (host,)).fetchone()
+            now = time.time()
+            slot = max(now, row[0]) if row else now
+            self._db.execute(
+                "INSERT INTO hosts (host, next_ts) VALUES (?, ?) "
+                "ON CONFLICT(host) DO UPDATE SET next_ts = excluded.next_ts",
+                (host, slot + min_interval),
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return slot - now
+
+    def set_status(self, shard: int, cursor: int, state: str, run: str = "") -> None:
+        """``state`` is ``active``, ``idle`` (queue empty) or ``finished`` (stopped for good)."""
+        self._db.execute(
+            "INSERT INTO shards (shard, cursor, state, updated, run) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(shard) DO UPDATE SET cursor = excluded.cursor, state = excluded.state, "
+            "updated = excluded.updated, run = excluded.run",
+            (shard, cursor, state, time.time(), run),
+        )
+
+    def all_done(self, count: int, run: str = "", stale_after: float = float("inf")) -> bool:
+        """True once every shard of ``run`` is finished, or idle with no unread routed links.
+
+        Rows of other runs (left over from an earlier crawl) do not count, however
+        recent; a shard started late still sees the ones that already finished.
+        A shard whose row was not refreshed for ``stale_after`` seconds, or that has
+        not written one ``stale_after`` seconds after this store was opened, is
+        taken as dead (killed, out of memory, lost machine) and no longer waited for.
+        """
+        now = time.time()
+        rows = {
+            shard: (cursor, state, updated)
+            for shard, cursor, state, updated in self._db.execute(
+                "SELECT shard, cursor, state, updated FROM shards WHERE run = ?", (run,)
+            )
+        }
+        for shard in range(count):
+            if shard not in rows:
+                if now - self._opened < stale_after:
+                    return False
+                self._give_up(shard, "never reported")
+                continue
+            cursor, state, updated = rows[shard]
+            if state == "finished":
+                continue
+            if now - updated > stale_after:
+                self._give_up(shard, f"silent for {now - updated:.0f}s")
+                continue
+            if state != "idle":
+                return False
+            pending = self._db.execute(
+                "SELECT 1 FROM links WHERE shard = ? AND id > ? LIMIT 1", (shard, cursor)
+            ).fetchone()
+            if pending:
+                return False
+        return True
+
+    def _give_up(self, shard: int, why: str) -> None:
+        if shard not in self._dead:
+            self._dead.add(shard)
+            logger.warning("shard %d %s; treating it as dead", shard, why)
+
+
+def shard_outputs(path: Path, count: int) -> List[Path]:
+    """The ``count`` shard files of output ``path``.
+
+    Raises ``ValueError`` if one is missing or if shard files of another shard
+    count exist: merging those would silently drop, or replace ``path`` with, a
+    partial crawl.
+    """
+    expected = [shard_path(path, i, count) for i in range(count)]
+    missing = [p.name for p in expected if not p.exists()]
+    if missing:
+        raise ValueError(f"missing shard outputs for {path}: {', '.join(missing)}")
+    other = sorted(
+        p.name for p in path.parent.glob(f"{path.stem}.shard-*-of-*{path.suffix}") if p not in expected
+    )
+    if other:
+        raise ValueError(f"shard outputs of another --shards value next to {path}: {', '.join(other)}")
+    return expected
+
+
+def merge_shard_outputs(shards: Sequence[Path], dest: Path) -> int:
+    """Concatenate shard outputs into ``dest`` (replaced atomically); returns the record count.
+
+    Raises ``ValueError``, leaving ``dest`` untouched, if a shard output is missing.
+    """
+    missing = [str(p) for p in shards if not p.exists()]
+    if missing or not shards:
+        raise ValueError(f"missing shard outputs: {', '.join(missing) or 'none given'}")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".merge-tmp")
+    for p in (tmp, index_path_for(tmp)):
+        if p.exists():
+            p.unlink()
+    writer = JsonlWriter(tmp)
+    count = 0
+    try:
+        with JsonlRecordStore(list(shards)) as store:
+            for rec in store.iter_records():
+                writer.write(rec)
+                count += 1
+    finally:
+        writer.close()
+    os.replace(tmp, dest)
+    os.replace(index_path_for(tmp), index_path_for(dest))
+    return count
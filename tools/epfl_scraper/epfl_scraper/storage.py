@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import json
 import hashlib
+import mmap
+import os
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
 
 
 def sha256_text(text: str) -> str:
@@ -15,17 +18,191 @@ def iso_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def index_path_for(output_path: Path) -> Path:
+    """Sidecar offset index kept next to a JSONL output file."""
+    return output_path.with_name(output_path.name + ".idx")
+
+
 class JsonlWriter:
-    def __init__(self, output_path: Path) -> None:
+    """Appends records to a JSONL file and, optionally, their byte offsets to a sidecar index.
+
+    Each sidecar line is ``{"url", "canonical_url", "checksum", "offset", "length"}``
+    so a single record can be read back without scanning the whole output.
+    """
+
+    def __init__(self, output_path: Path, index: bool = True) -> None:
         self.output_path = output_path
-        self._fh = output_path.open("a", encoding="utf-8")
+        idx_path = index_path_for(output_path)
+        if index and not idx_path.exists() and output_path.exists() and output_path.stat().st_size:
+            _backfill_index(output_path, idx_path)
+        self._fh = output_path.open("ab")
+        self._idx = idx_path.open("a", encoding="utf-8") if index else None
 
     def write(self, obj: dict) -> None:
-        self._fh.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        line = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+        offset = self._fh.tell()
+        self._fh.write(line)
         self._fh.flush()
+        if self._idx is not None:
+            self._idx.write(json.dumps(_index_entry(obj, offset, len(line)), ensure_ascii=False) + "\n")
+            self._idx.flush()
+
+    def sync(self) -> Dict[str, int]:
+        """Flush to disk and return the size of every file written, for checkpoints."""
+        sizes = {str(self.output_path): _fsync(self._fh)}
+        if self._idx is not None:
+            sizes[str(index_path_for(self.output_path))] = _fsync(self._idx)
+        return sizes
 
     def close(self) -> None:
         self._fh.close()
+        if self._idx is not None:
+            self._idx.close()
+
+
+def _fsync(fh) -> int:
+    fh.flush()
+    os.fsync(fh.fileno())
+    return fh.tell()
+
+
+def _scan_records(data, start: int, stop: int) -> Iterator[tuple[dict, int, int]]:
+    """``(record, offset, length)`` of every JSONL line in ``data[start:stop]``."""
+    pos = start
+    while pos < stop:
+        nl = data.find(b"\n", pos, stop)
+        end = stop if nl == -1 else nl + 1
+        raw = data[pos:end].strip()
+        if raw:
+            yield json.loads(raw.decode("utf-8")), pos, end - pos
+        pos = end
+
+
+def _backfill_index(output_path: Path, idx_path: Path) -> None:
+    """Write the sidecar of an output created before sidecars existed."""
+    data = output_path.read_bytes()
+    tmp = idx_path.with_name(idx_path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as fh:
+        for obj, offset, length in _scan_records(data, 0, len(data)):
+            fh.write(json.dumps(_index_entry(obj, offset, length), ensure_ascii=False) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, idx_path)
+
+
+def _index_entry(obj: dict, offset: int, length: int) -> dict:
+    return {
+        "url": obj.get("url"),
+        "canonical_url": obj.get("canonical_url"),
+        "checksum": obj.get("checksum"),
+        "offset": offset,
+        "length": length,
+    }
+
+
+@dataclass(frozen=True)
+class RecordLocation:
+    shard: int
+    offset: int
+    length: int
+
+
+class JsonlRecordStore:
+    """Random access to records of one or more JSONL shards through their sidecar indexes.
+
+    Shards are memory-mapped; lookups by url or checksum parse only the requested
+    line. Bytes no sidecar entry covers (a legacy prefix, gaps, or the tail left
+    by a writer created with ``index=False``) are indexed by scanning just them.
+    """
+
+    def __init__(self, paths: Sequence[Path]) -> None:
+        self.paths = [Path(p) for p in paths]
+        self._maps: List[Optional[mmap.mmap]] = []
+        self._by_url: Dict[str, RecordLocation] = {}
+        self._by_checksum: Dict[str, RecordLocation] = {}
+        self._entries: List[tuple[dict, RecordLocation]] = []
+        for shard, path in enumerate(self.paths):
+            self._maps.append(self._open_map(path))
+            self._load_shard(shard, path)
+
+    @staticmethod
+    def _open_map(path: Path) -> Optional[mmap.mmap]:
+        if not path.exists() or path.stat().st_size == 0:
+            return None
+        with path.open("rb") as fh:
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _add(self, entry: dict, loc: RecordLocation) -> None:
+        self._entries.append((entry, loc))
+        for key in ("url", "canonical_url"):
+            if entry.get(key):
+                self._by_url[entry[key]] = loc
+        if entry.get("checksum"):
+            self._by_checksum[entry["checksum"]] = loc
+
+    def _load_shard(self, shard: int, path: Path) -> None:
+        data = self._maps[shard]
+        size = len(data) if data is not None else 0
+        end = 0
+        idx_path = index_path_for(path)
+        if idx_path.exists():
+            for line in idx_path.read_text(encoding="utf-8").splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["offset"] + entry["length"] > size:
+                    # Sidecar is ahead of the data file (e.g. truncated output); ignore the rest
+                    break
+                if entry["offset"] < end:
+                    continue
+                self._scan_gap(shard, end, entry["offset"])
+                self._add(entry, RecordLocation(shard, entry["offset"], entry["length"]))
+                end = entry["offset"] + entry["length"]
+        self._scan_gap(shard, end, size)
+
+    def _scan_gap(self, shard: int, start: int, stop: int) -> None:
+        data = self._maps[shard]
+        if data is None or start >= stop:
+            return
+        for obj, offset, length in _scan_records(data, start, stop):
+            self._add(_index_entry(obj, offset, length), RecordLocation(shard, offset, length))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def read(self, loc: RecordLocation) -> dict:
+        data = self._maps[loc.shard]
+        assert data is not None
+        return json.loads(data[loc.offset:loc.offset + loc.length].decode("utf-8"))
+
+    def locate_url(self, url: str) -> Optional[RecordLocation]:
+        return self._by_url.get(url)
+
+    def get_by_url(self, url: str) -> Optional[dict]:
+        loc = self._by_url.get(url)
+        return self.read(loc) if loc else None
+
+    def get_by_checksum(self, checksum: str) -> Optional[dict]:
+        loc = self._by_checksum.get(checksum)
+        return self.read(loc) if loc else None
+
+    def iter_records(self, where: Optional[Callable[[dict], bool]] = None) -> Iterator[dict]:
+        """Yield records whose index entry matches ``where``; others are never parsed."""
+        for entry, loc in self._entries:
+            if where is None or where(entry):
+                yield self.read(loc)
+
+    def close(self) -> None:
+        for data in self._maps:
+            if data is not None:
+                data.close()
+        self._maps = []
+
+    def __enter__(self) -> "JsonlRecordStore":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
 
 
 def save_text_mirror(mirror_dir: Optional[Path], url: str, text: str) -> Optional[Path]:
@@ -42,6 +219,7 @@ class VisitedSet:
     def __init__(self, path: Path) -> None:
         self.path = path
         self._set = set()
+        self._fh = None
         if path.exists():
             for line in path.read_text(encoding="utf-8").splitlines():
                 s = line.strip()
@@ -52,8 +230,20 @@ class VisitedSet:
         if url in self._set:
             return
         self._set.add(url)
-        with self.path.open("a", encoding="utf-8") as fh:
-            fh.write(url + "\n")
+        if self._fh is None:
+            self._fh = self.path.open("a", encoding="utf-8")
+        self._fh.write(url + "\n")
+        self._fh.flush()
+
+    def sync(self) -> Dict[str, int]:
+        if self._fh is None:
+            return {str(self.path): self.path.stat().st_size if self.path.exists() else 0}
+        return {str(self.path): _fsync(self._fh)}
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
 
     def __contains__(self, url: str) -> bool:
         return url in self._set
@@ -72,3 +262,72 @@ class Frontier:
         if not self.path.exists():
             return []
         return [l.strip() for l in self.path.read_text(encoding="utf-8").splitlines() if l.strip()]
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write ``text`` to ``path`` so readers see either the old or the new content."""
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as fh:
+        fh.write(text)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+class Checkpoint:
+    """Single atomic snapshot of the crawl state.
+
+    Append-only files (visited log, outputs and their sidecars) are recorded by
+    size, and everything else (frontier, inbox cursor) by value. Restoring
+    truncates those files back to the recorded sizes, which drops whatever was
+    written after the snapshot; the matching URLs are still in the saved frontier.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def load(self) -> Optional[dict]:
+        if not self.path.exists():
+            return None
+        return json.loads(self.path.read_text(encoding="utf-8"))
+
+    def save(self, state: dict) -> None:
+        # Absolute paths, so a resume from another working directory finds the same files
+        state = dict(
+            state,
+            files={str(Path(name).resolve()): size for name, size in state.get("files", {}).items()},
+            may_be_absent=[str(Path(name).resolve()) for name in state.get("may_be_absent", [])],
+        )
+        atomic_write_text(self.path, json.dumps(state, ensure_ascii=False))
+
+    @staticmethod
+    def truncate_files(state: dict) -> Dict[str, int]:
+        """Cut every recorded file back to its size; returns bytes dropped per file.
+
+        Raises ``ValueError`` without touching anything if a file is shorter than
+        recorded, or missing: data covered by the checkpoint was lost, and resuming
+        would skip pages whose records are gone. Only files listed in
+        ``may_be_absent`` (the change log, renamed when it is published) and files
+        recorded empty may be missing.
+        """
+        sizes = {Path(name): size for name, size in state.get("files", {}).items()}
+        may_be_absent = {Path(name) for name in state.get("may_be_absent", [])}
+        lost: List[str] = []
+        for path, size in sizes.items():
+            if not path.exists():
+                if size > 0 and path not in may_be_absent:
+                    lost.append(f"{path} (missing, {size} bytes recorded)")
+            elif path.stat().st_size < size:
+                lost.append(f"{path} ({path.stat().st_size} < {size} bytes)")
+        if lost:
+            raise ValueError(
+                "files are shorter than the checkpoint recorded: " + ", ".join(lost)
+                + "; restore them or start over with a fresh --state-dir"
+            )
+        dropped: Dict[str, int] = {}
+        for path, size in sizes.items():
+            if path.exists() and path.stat().st_size > size:
+                dropped[str(path)] = path.stat().st_size - size
+                with path.open("r+b") as fh:
+                    fh.truncate(size)
+        return dropped
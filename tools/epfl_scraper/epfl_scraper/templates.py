@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from lxml import html as lxml_html
+
+from .extract import DROP_TAGS, ExtractResult, block_text, extract_text
+from .storage import atomic_write_text
+
+_CONTAINER_TAGS = {"main", "article", "section", "div"}
+_WORD = re.compile(r"\w+", re.UNICODE)
+_HAS_DIGIT = re.compile(r"\d")
+
+
+@dataclass
+class Template:
+    """What is known about one page layout (one fingerprint)."""
+
+    status: str = "learning"  # learning -> learned | rejected
+    xpath: Optional[str] = None
+    # xpath -> [sum of agreement, number of sample pages]
+    scores: Dict[str, List[float]] = field(default_factory=dict)
+    samples: int = 0
+    fast_pages: int = 0
+    agreement: float = 0.0  # mean agreement on the sample pages
+    # Where the generic extractor's title and lang come from on this layout
+    title_xpath: Optional[str] = None
+    title_hits: Dict[str, int] = field(default_factory=dict)
+    lang_from_html: bool = True
+
+
+@dataclass
+class TemplateStats:
+    fast: int = 0
+    generic: int = 0
+    fast_seconds: float = 0.0
+    generic_seconds: float = 0.0
+    validations: int = 0
+    validation_failures: int = 0
+    agreement_sum: float = 0.0
+
+    def report(self) -> str:
+        fast_rate = self.fast / self.fast_seconds if self.fast_seconds else 0.0
+        generic_rate = self.generic / self.generic_seconds if self.generic_seconds else 0.0
+        agreement = self.agreement_sum / self.validations if self.validations else 0.0
+        return (
+            f"fast={self.fast} ({fast_rate:.0f} pages/s) generic={self.generic} ({generic_rate:.0f} pages/s) "
+            f"validations={self.validations} failed={self.validation_failures} agreement={agreement:.3f}"
+        )
+
+
+def layout_fingerprint(tree: Any) -> str:
+    """Hash of the page skeleton: stable body classes plus the tag/id/class outline of the first levels.
+
+    Tokens containing digits (``page-id-1234``) are ignored so pages of one CMS
+    template share a fingerprint.
+    """
+    parts: List[str] = []
+    body = tree.find(".//body")
+    root = body if body is not None else tree
+    parts.append(" ".join(sorted(c for c in (root.get("class") or "").split() if not _HAS_DIGIT.search(c))))
+
+    def outline(el: Any, depth: int) -> None:
+        for child in el:
+            if not isinstance(child.tag, str) or child.tag in DROP_TAGS[:3]:
+                continue
+            cls = ".".join(c for c in (child.get("class") or "").split()[:2] if not _HAS_DIGIT.search(c))
+            parts.append(f"{depth}:{child.tag}#{child.get('id') or ''}.{cls}")
+            if depth < 3:
+                outline(child, depth + 1)
+
+    outline(root, 1)
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def region_text(tree: Any, xpath: str) -> Optional[str]:
+    """Text of the first element matching ``xpath``, joined by block like ``extract_lxml_fast``."""
+    try:
+        found = tree.xpath(xpath)
+    except Exception:
+        return None
+    if not found or not hasattr(found[0], "iter"):
+        return None
+    return block_text(found[0])
+
+
+def agreement(reference: Optional[str], candidate: Optional[str]) -> float:
+    """Bag-of-words F1 between two extractions (1.0 = same words, same counts)."""
+    ref = Counter(w.lower() for w in _WORD.findall(reference or ""))
+    cand = Counter(w.lower() for w in _WORD.findall(candidate or ""))
+    if not ref or not cand:
+        return 0.0
+    overlap = sum((ref & cand).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(cand.values())
+    recall = overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def candidate_xpaths(tree: Any, min_chars: int, limit: int = 40) -> List[str]:
+    """Attribute-based XPaths of containers holding at least ``min_chars`` of text."""
+    out: List[str] = []
+    for el in tree.iter(*_CONTAINER_TAGS):
+        if el.tag in ("main", "article"):
+            xp = f"//{el.tag}"
+        elif el.get("id") and not _HAS_DIGIT.search(el.get("id")):
+            xp = f"//{el.tag}[@id='{el.get('id')}']"
+        elif el.get("class") and "'" not in el.get("class"):
+            xp = f"//{el.tag}[@class='{el.get('class')}']"
+        else:
+            continue
+        if xp in out or len(el.text_content()) < min_chars:
+            continue
+        out.append(xp)
+        if len(out) >= limit:
+            break
+    return out
+
+
+_TITLE_XPATHS = ("//meta[@property='og:title']/@content", "//title", "//h1")
+
+
+def _first_text(tree: Any, xpath: str) -> Optional[str]:
+    found = tree.xpath(xpath)
+    if not found:
+        return None
+    value = found[0] if isinstance(found[0], str) else found[0].text_content()
+    return " ".join(value.split()) or None
+
+
+def _html_lang(tree: Any) -> Optional[str]:
+    lang = tree.get("lang")
+    return lang.split("-")[0].lower() if lang else None
+
+
+class TemplateExtractor:
+    """Learns one content-region XPath per page layout and uses it instead of the generic extractor.
+
+    For each layout fingerprint, the first ``sample_size`` pages go through
+    ``generic`` and every candidate region is scored against its output. If the
+    best region's mean agreement reaches ``min_agreement``, later pages with that
+    fingerprint are extracted from the region alone. Every ``validate_every``-th
+    fast page is re-checked against ``generic``; a failed check sends the layout
+    back to learning. Pages with an unknown or rejected layout use ``generic``.
+
+    Output only depends on the page and its layout's state: a learned layout
+    always yields the region text, validation pages included, so checksums do
+    not change with which page happened to be validated. Templates are stored
+    per ``generic_name``, since they are only valid for the backend they were
+    learned from.
+    """
+
+    def __init__(
+        self,
+        state_file: Optional[Path] = None,
+        generic: Callable[[str, str], ExtractResult] = extract_text,
+        sample_size: int = 5,
+        min_agreement: float = 0.9,
+        validate_every: int = 50,
+        generic_name: str = "trafilatura",
+    ) -> None:
+        self.state_file = state_file
+        self.generic = generic
+        self.generic_name = generic_name
+        self.sample_size = sample_size
+        self.min_agreement = min_agreement
+        self.validate_every = validate_every
+        self.templates: Dict[str, Template] = {}
+        self.stats = TemplateStats()
+        # Templates of the other backends, written back unchanged by save()
+        self._others: Dict[str, Any] = {}
+        if state_file and state_file.exists():
+            # Files without the "extractors" key predate per-backend templates; relearn
+            raw = json.loads(state_file.read_text(encoding="utf-8")).get("extractors", {})
+            self.templates = {fp: Template(**t) for fp, t in raw.pop(generic_name, {}).items()}
+            self._others = raw
+
+    def save(self) -> None:
+        if self.state_file:
+            data = dict(self._others)
+            data[self.generic_name] = {fp: asdict(t) for fp, t in self.templates.items()}
+            atomic_write_text(self.state_file, json.dumps({"extractors": data}))
+
+    def _generic(self, html: str, url: str) -> ExtractResult:
+        start = time.perf_counter()
+        result = self.generic(html, url)
+        self.stats.generic += 1
+        self.stats.generic_seconds += time.perf_counter() - start
+        return result
+
+    def extract(self, html: str, url: str) -> ExtractResult:
+        start = time.perf_counter()
+        try:
+            tree = lxml_html.fromstring(html)
+        except Exception:
+            return self._generic(html, url)
+        fp = layout_fingerprint(tree)
+        tpl = self.templates.setdefault(fp, Template())
+
+        if tpl.status == "learned" and tpl.xpath:
+            tpl.fast_pages += 1
+            text = region_text(tree, tpl.xpath)
+            if not text:
+                return self._generic(html, url)
+            fast = (text, _first_text(tree, tpl.title_xpath or "//title"), _html_lang(tree) if tpl.lang_from_html else None)
+            if tpl.fast_pages % self.validate_every != 0:
+                self.stats.fast += 1
+                self.stats.fast_seconds += time.perf_counter() - start
+                return fast
+            result = self._generic(html, url)
+            score = agreement(result[0], text)
+            self.stats.validations += 1
+            self.stats.agreement_sum += score
+            if score < self.min_agreement:
+                self.stats.validation_failures += 1
+                self.templates[fp] = Template()
+                return result
+            # Same output as any other page of the layout
+            return fast
+
+        result = self._generic(html, url)
+        if tpl.status == "learning" and result[0]:
+            self._learn(tpl, tree, result)
+        return result
+
+    def _learn(self, tpl: Template, tree: Any, result: ExtractResult) -> None:
+        reference, title, lang = result
+        for xp in _TITLE_XPATHS:
+            if title and _first_text(tree, xp) == title:
+                tpl.title_hits[xp] = tpl.title_hits.get(xp, 0) + 1
+        tpl.lang_from_html = tpl.lang_from_html and lang == _html_lang(tree)
+        for xp in candidate_xpaths(tree, min_chars=len(reference) // 2):
+            entry = tpl.scores.setdefault(xp, [0.0, 0])
+            entry[0] += agreement(reference, region_text(tree, xp))
+            entry[1] += 1
+        tpl.samples += 1
+        if tpl.samples < self.sample_size:
+            return
+        # Only regions present on every sample page qualify
+        complete = {xp: s / n for xp, (s, n) in tpl.scores.items() if n == tpl.samples}
+        if complete:
+            best = max(complete, key=complete.get)
+            tpl.xpath, tpl.agreement = best, complete[best]
+        titles = [xp for xp, n in tpl.title_hits.items() if n == tpl.samples]
+        tpl.title_xpath = titles[0] if titles else None
+        tpl.status = "learned" if tpl.agreement >= self.min_agreement else "rejected"
+        tpl.scores = {}
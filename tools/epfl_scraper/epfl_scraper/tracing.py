@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+# httpcore trace events (``<name>.started`` / ``<name>.complete``) turned into spans
+HTTP_SPANS = {
+    "connection.connect_tcp": "connect",
+    "connection.start_tls": "tls",
+    "http11.send_request_headers": "send_request",
+    "http11.receive_response_headers": "wait_response",
+    "http11.receive_response_body": "download",
+    "http2.send_request_headers": "send_request",
+    "http2.receive_response_headers": "wait_response",
+    "http2.receive_response_body": "download",
+}
+
+
+class Tracer:
+    """Per-URL span timeline in Chrome trace-event format (chrome://tracing, Perfetto).
+
+    A URL is sampled when its hash falls under ``sample_rate``, so the decision is
+    the same wherever it is made (queueing, fetch, extraction). Each sampled URL
+    gets its own track. Files are rotated every ``max_events`` events and only
+    the newest ``max_files`` are kept. A tracer without ``trace_dir`` records nothing.
+    """
+
+    def __init__(
+        self,
+        trace_dir: Optional[Path] = None,
+        sample_rate: float = 0.01,
+        max_events: int = 200_000,
+        max_files: int = 5,
+    ) -> None:
+        self.trace_dir = trace_dir
+        self.sample_rate = sample_rate if trace_dir else 0.0
+        self.max_events = max_events
+        self.max_files = max_files
+        self._t0 = time.perf_counter()
+        self._pid = os.getpid()
+        self._tracks: Dict[str, int] = {}
+        self._fh: Any = None
+        self._events_in_file = 0
+        self._file_no = 0
+        if trace_dir:
+            trace_dir.mkdir(parents=True, exist_ok=True)
+            existing = sorted(trace_dir.glob("trace-*.json"))
+            if existing:
+                self._file_no = int(existing[-1].stem.split("-")[1])
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def sampled(self, url: str) -> bool:
+        if self.sample_rate <= 0:
+            return False
+        if self.sample_rate >= 1:
+            return True
+        h = int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+        return h / 2**64 < self.sample_rate
+
+    def span(self, name: str, url: str, **args: Any):
+        """Context manager timing ``name`` on the track of ``url``; free when not sampled."""
+        if not self.sampled(url):
+            return nullcontext()
+        return self._span(name, url, args)
+
+    @contextmanager
+    def _span(self, name: str, url: str, args: Dict[str, Any]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, url, start, time.perf_counter(), **args)
+
+    def add_span(self, name: str, url: str, start: float, end: float, **args: Any) -> None:
+        """Record a span measured elsewhere, from ``perf_counter`` timestamps."""
+        if not self.sampled(url):
+            return
+        self._maybe_rotate()
+        tid = self._track(url)
+        self._emit({
+            "name": name,
+            "cat": "crawl",
+            "ph": "X",
+            "ts": round((start - self._t0) * 1e6, 1),
+            "dur": round(max(0.0, end - start) * 1e6, 1),
+            "pid": self._pid,
+            "tid": tid,
+            "args": args,
+        })
+
+    def http_hook(self, url: str):
+        """httpx ``extensions={"trace": ...}`` callback emitting connect/download spans, or None."""
+        if not self.sampled(url):
+            return None
+        started: Dict[str, float] = {}
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            base, _, phase = event_name.rpartition(".")
+            span = HTTP_SPANS.get(base)
+            if span is None:
+                return
+            if phase == "started":
+                started[base] = time.perf_counter()
+            elif phase in ("complete", "failed") and base in started:
+                extra = {"failed": True} if phase == "failed" else {}
+                self.add_span(span, url, started.pop(base), time.perf_counter(), **extra)
+
+        return trace
+
+    def _track(self, url: str) -> int:
+        tid = self._tracks.get(url)
+        if tid is None:
+            tid = self._tracks[url] = len(self._tracks) + 1
+            self._emit({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": url}})
+        return tid
+
+    def _maybe_rotate(self) -> None:
+        if self._fh is None or self._events_in_file >= self.max_events:
+            self._rotate()
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        self._fh.write(("[\n" if self._events_in_file == 0 else ",\n") + json.dumps(event, ensure_ascii=False))
+        self._events_in_file += 1
+
+    def _rotate(self) -> None:
+        self._close_file()
+        assert self.trace_dir is not None
+        self._file_no += 1
+        self._fh = (self.trace_dir / f"trace-{self._file_no:06d}.json").open("w", encoding="utf-8")
+        self._events_in_file = 0
+        # Tracks are re-announced in every file so each one opens on its own
+        self._tracks.clear()
+        for old in sorted(self.trace_dir.glob("trace-*.json"))[:-self.max_files]:
+            old.unlink()
+
+    def _close_file(self) -> None:
+        if self._fh is not None:
+            self._fh.write("\n]\n")
+            self._fh.close()
+            self._fh = None
+
+    def close(self) -> None:
+        self._close_file()
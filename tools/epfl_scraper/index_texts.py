@@ -1,31 +1,50 @@
 # tools/epfl_scraper/index_texts.py
-import os, re, json, time, hashlib, requests, nltk
+import argparse, os, re, json, time, hashlib
 from pathlib import Path
 from typing import Dict, Any, Iterable, List
-from nltk.tokenize import sent_tokenize, word_tokenize
 from dotenv import load_dotenv
 
+from epfl_scraper.boilerplate import (
+    BoilerplateIndex,
+    BoilerplateStats,
+    build_boilerplate_index,
+    drop_duplicate_chunks,
+    shared_chunks,
+    strip_boilerplate,
+)
+from epfl_scraper.search_index import LocalIndexWriter
+
 # ---------- env ----------
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
 INDEX_URL = os.getenv("INDEX_URL")
 INDEX_KEY = os.getenv("INDEX_KEY")
-if not INDEX_URL or not INDEX_KEY:
-    raise SystemExit("[error] Missing INDEX_URL or INDEX_KEY in .env")
-ensure_nltk()
+
+def require_index_credentials():
+    if not INDEX_URL or not INDEX_KEY:
+        raise SystemExit("[error] Missing INDEX_URL or INDEX_KEY in .env")
 
 # ---------- NLTK ----------
+# Loaded on first use, so --help and imports of this module don't pay for it
+_tokenizers = None
+
 def ensure_nltk():
-    try:
-        nltk.data.find("tokenizers/punkt")
-    except LookupError:
-        nltk.download("punkt", quiet=True)
+    global _tokenizers
+    if _tokenizers is None:
+        import nltk
+        from nltk import tokenize
+        try:
+            nltk.data.find("tokenizers/punkt")
+        except LookupError:
+            nltk.download("punkt", quiet=True)
+        _tokenizers = tokenize
+    return _tokenizers
 
 def sent_tokenize_lang(text: str, lang: str | None) -> List[str]:
     # basic language switch; extend if you need more languages
     l = (lang or "en").lower()
     if l.startswith("fr"):
-        return sent_tokenize(text, language="french")
-    return sent_tokenize(text, language="english")
+        return ensure_nltk().sent_tokenize(text, language="french")
+    return ensure_nltk().sent_tokenize(text, language="english")
 
 # ---------- ids ----------
 def stable_id(s: str) -> str:
@@ -40,7 +59,7 @@ def normalize(text: str) -> str:
 
 def _split_long_sentence(s: str, max_chars: int) -> List[str]:
     out, buf, cur_len = [], [], 0
-    for w in word_tokenize(s):
+    for w in ensure_nltk().word_tokenize(s):
         add = (1 if buf else 0) + len(w)
         if cur_len + add <= max_chars:
             buf.append(w); cur_len += add
@@ -73,6 +92,9 @@ def chunk_text(text: str, lang: str | None, max_chars=1500, overlap_sents=2) ->
 
 # ---------- HTTP ----------
 def index_batches(chunks: List[Dict[str, Any]], batch=64, pause=0.05):
+    # Only uploads need it; --local-index --no-upload runs never import requests
+    import requests
+
     for i in range(0, len(chunks), batch):
         payload = {"chunks": chunks[i:i+batch]}
         r = requests.post(
@@ -92,6 +114,7 @@ def load_json_records(file: Path) -> Iterable[Dict[str, Any]]:
       - JSONL/NDJSON: one JSON object per line
       - JSON array
       - single JSON object
+    Values that are not objects (e.g. a list of ids) are not records and are skipped.
     """
     txt = file.read_text(encoding="utf-8").strip()
     if not txt:
@@ -101,26 +124,65 @@ def load_json_records(file: Path) -> Iterable[Dict[str, Any]]:
         for line in txt.splitlines():
             line = line.strip()
             if line:
-                yield json.loads(line)
+                rec = json.loads(line)
+                if isinstance(rec, dict):
+                    yield rec
         return
     # Try JSON array/object
     obj = json.loads(txt)
-    if isinstance(obj, list):
-        for rec in obj:
+    for rec in (obj if isinstance(obj, list) else [obj]):
+        if isinstance(rec, dict):
             yield rec
-    else:
-        yield obj
+
+# ---------- change feed ----------
+def load_manifest(changes_dir: Path) -> Dict[str, str]:
+    """url -> checksum of the last completed crawl, over every manifest.json under changes_dir (one per shard)."""
+    manifest: Dict[str, str] = {}
+    for path in sorted(changes_dir.rglob("manifest.json")):
+        manifest.update(json.loads(path.read_text(encoding="utf-8")))
+    return manifest
+
+def current_records(records: Iterable[Dict[str, Any]], manifest: Dict[str, str] | None,
+                    seen: set | None = None) -> Iterable[Dict[str, Any]]:
+    """Records still current in the manifest: old versions of modified pages and removed
+    pages, left in earlier delta files, are dropped, and each version is kept once.
+    Records without a checksum are not from the change feed and are kept."""
+    for rec in records:
+        checksum = rec.get("checksum")
+        if manifest is not None and checksum is not None:
+            key = (rec.get("url"), checksum)
+            if manifest.get(key[0]) != checksum or (seen is not None and key in seen):
+                continue
+            if seen is not None:
+                seen.add(key)
+        yield rec
+
+# Per-shard outputs of a sharded crawl (out.shard-01-of-04.jsonl); their records are in the merged file
+_SHARD_FILE = re.compile(r"\.shard-\d+-of-\d+\.[^.]+$")
+
+def find_input_files(data_dir: Path, exclude: Iterable[Path] = ()) -> List[Path]:
+    """Every .jsonl/.json file under data_dir, except shard outputs and those inside an excluded directory."""
+    skip = [d.resolve() for d in exclude]
+    files = list(data_dir.rglob("*.jsonl")) + list(data_dir.rglob("*.json"))
+    return [
+        f for f in files
+        if not _SHARD_FILE.search(f.name) and not any(f.resolve().is_relative_to(d) for d in skip)
+    ]
 
 # ---------- per-record indexing ----------
-def build_chunks_from_record(rec: Dict[str, Any], max_chars=1500, overlap_sents=2) -> List[Dict[str, Any]]:
+def build_chunks_from_record(rec: Dict[str, Any], max_chars=1500, overlap_sents=2,
+                             boilerplate: BoilerplateIndex | None = None,
+                             stats: BoilerplateStats | None = None) -> List[Dict[str, Any]]:
     text = (rec.get("text") or "").strip()
+    if boilerplate:
+        text = strip_boilerplate(text, boilerplate, stats).strip()
     if not text:
         return []
     url = rec.get("canonical_url") or rec.get("url") or ""
     title = rec.get("title") or ""
     lang = rec.get("lang")
 
-    base_key = rec.get("checksum") or url or (title + text[:80])
+    base_key = rec.get("checksum") or url or (title + (rec.get("text") or "")[:80])
     base = stable_id(base_key)
 
     out: List[Dict[str, Any]] = []
@@ -139,36 +201,99 @@ def build_chunks_from_record(rec: Dict[str, Any], max_chars=1500, overlap_sents=
         })
     return out
 
+# ---------- boilerplate ----------
+# A paragraph repeated on this many pages (or this share of all pages) is
+# treated as site chrome (banners, footers, "contact the service", ...).
+BOILERPLATE_MIN_DOCS = 5
+BOILERPLATE_MIN_RATIO = 0.02
+
+def build_corpus_boilerplate(files: List[Path], stats: BoilerplateStats,
+                             manifest: Dict[str, str] | None = None) -> BoilerplateIndex:
+    records = current_records((rec for f in files for rec in load_json_records(f)), manifest, set())
+    return build_boilerplate_index(records, BOILERPLATE_MIN_DOCS, BOILERPLATE_MIN_RATIO, stats)
+
 # ---------- file indexing ----------
-def index_json_file(path: Path, max_chars=1500, overlap_sents=2):
-    records = list(load_json_records(path))
+def index_json_file(path: Path, max_chars=1500, overlap_sents=2,
+                    sink=None,
+                    boilerplate: BoilerplateIndex | None = None,
+                    seen_chunks: set | None = None,
+                    stats: BoilerplateStats | None = None,
+                    manifest: Dict[str, str] | None = None,
+                    seen_records: set | None = None):
+    records = list(current_records(load_json_records(path), manifest, seen_records))
     if not records:
         print(f"{path} -> 0 records (skipped)")
         return
     all_chunks: List[Dict[str, Any]] = []
     for rec in records:
-        all_chunks.extend(build_chunks_from_record(rec, max_chars, overlap_sents))
+        all_chunks.extend(build_chunks_from_record(rec, max_chars, overlap_sents, boilerplate, stats))
+    if seen_chunks is not None:
+        all_chunks = drop_duplicate_chunks(all_chunks, seen_chunks, stats)
     if not all_chunks:
         print(f"{path} -> 0 chunks (skipped)")
         return
-    index_batches(all_chunks)
+    (sink or index_batches)(all_chunks)
     print(f"{path} -> {len(all_chunks)} chunks")
 
 # ---------- main ----------
-def main():
-    # Default to tools/epfl_scraper/data next to this script
-    base = Path(__file__).resolve().parent
-    data_dir = base / "data"
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Chunk crawled JSON/JSONL files and index them")
+    parser.add_argument("--data-dir", type=Path, default=Path(__file__).resolve().parent / "data",
+                        help="Directory scanned for .json/.jsonl files")
+    parser.add_argument("--local-index", type=Path, default=None,
+                        help="Also build a local BM25 index in this directory (query with python -m epfl_scraper.search_index)")
+    parser.add_argument("--no-upload", action="store_true", help="Skip uploading chunks to INDEX_URL")
+    parser.add_argument("--changes-dir", type=Path, default=None,
+                        help="Change feed of the crawls (--changes-dir of the crawler): only index page versions in its manifest")
+    return parser.parse_args(argv)
 
-    # Scan both .jsonl and .json
-    files = list(data_dir.rglob("*.jsonl")) + list(data_dir.rglob("*.json"))
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.no_upload:
+        require_index_credentials()
+    local = LocalIndexWriter(args.local_index) if args.local_index else None
+
+    def sink(chunks: List[Dict[str, Any]]):
+        if local is not None:
+            local.add(chunks)
+        if not args.no_upload:
+            index_batches(chunks)
+
+    # Defaults to tools/epfl_scraper/data next to this script
+    data_dir = args.data_dir
+
+    # Scan both .jsonl and .json; a local index or change feed under data_dir holds .json files too
+    files = find_input_files(data_dir, exclude=[d for d in (args.local_index, args.changes_dir) if d])
+    manifest = None
+    if args.changes_dir:
+        manifest = load_manifest(args.changes_dir)
+        if not manifest:
+            raise SystemExit(f"[error] no manifest.json under {args.changes_dir}; has a crawl completed?")
+        print(f"[info] manifest: {len(manifest)} current pages")
     print(f"[info] data_dir={data_dir}  files={len(files)}")
     if not files:
         raise SystemExit("[error] no JSON/JSONL files found")
 
+    # Corpus pass: find paragraphs shared by many pages before chunking
+    stats = BoilerplateStats()
+    boilerplate = build_corpus_boilerplate(files, stats, manifest)
+    seen_chunks: set = set()
+    if boilerplate:
+        shared = shared_chunks(boilerplate, stats)
+        sink(shared)
+        print(f"[boilerplate] {len(shared)} shared chunks")
+
+    seen_records: set = set()
     for f in files:
         print(f"[index] {f}")
-        index_json_file(f, max_chars=1500, overlap_sents=2)
+        index_json_file(f, max_chars=1500, overlap_sents=2, sink=sink,
+                        boilerplate=boilerplate, seen_chunks=seen_chunks, stats=stats,
+                        manifest=manifest, seen_records=seen_records)
+    print(f"[boilerplate] {stats.summary()}")
+    if local is not None:
+        # Every run re-reads the whole corpus, so its chunks replace the index
+        segment = local.flush(replace_all=True)
+        print(f"[local-index] wrote {segment or 'nothing'} in {args.local_index}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import pytest
+
+from epfl_scraper.config import ScraperConfig
+from epfl_scraper.fetch import FetchResult, PoliteHttpClient
+
+BASE = "https://www.epfl.ch/education"
+
+
+def page_html(title: str, body: str, links: Iterable[str] = ()) -> str:
+    anchors = "".join(f'<a href="{u}">{u}</a>' for u in links)
+    return f"<html><head><title>{title}</title></head><body><main><p>{body}</p>{anchors}</main></body></html>"
+
+
+class FakeSite:
+    """In-memory pages served in place of ``PoliteHttpClient.fetch``."""
+
+    def __init__(self) -> None:
+        self.pages: Dict[str, Tuple[int, str]] = {}
+        self.fetches: Counter[str] = Counter()
+
+    def add(self, url: str, html: str, status: int = 200) -> None:
+        self.pages[url] = (status, html)
+
+    def chain(self, n: int, prefix: str = BASE) -> None:
+        """Pages ``p0..p{n-1}`` forming a binary tree rooted at ``p0``."""
+        for i in range(n):
+            links = [f"{prefix}/p{j}" for j in (2 * i + 1, 2 * i + 2) if j < n]
+            self.add(f"{prefix}/p{i}", page_html(f"P{i}", f"Content of page number {i} about studies.", links))
+
+    async def fetch(self, client: PoliteHttpClient, url: str) -> Optional[FetchResult]:
+        self.fetches[url] += 1
+        if url not in self.pages:
+            return FetchResult(url=url, status_code=404, content_type="text/html", text=None, final_url=url)
+        status, html = self.pages[url]
+        return FetchResult(url=url, status_code=status, content_type="text/html", text=html, final_url=url)
+
+
+@pytest.fixture
+def fake_site(monkeypatch) -> FakeSite:
+    site = FakeSite()
+
+    async def _fetch(self, url):
+        return await site.fetch(self, url)
+
+    monkeypatch.setattr(PoliteHttpClient, "fetch", _fetch)
+    return site
+
+
+def make_cfg(tmp_path: Path, **kw) -> ScraperConfig:
+    defaults = dict(
+        start_urls=[f"{BASE}/p0"],
+        allow_paths=["/education"],
+        output_jsonl=tmp_path / "out.jsonl",
+        state_dir=tmp_path / "state",
+        rate_per_sec=1000.0,
+        jitter_s=0.0,
+        obey_robots=False,
+    )
+    defaults.update(kw)
+    return ScraperConfig(**defaults)
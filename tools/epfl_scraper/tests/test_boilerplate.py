@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from epfl_scraper.boilerplate import (
+    BoilerplateStats,
+    build_boilerplate_index,
+    drop_duplicate_chunks,
+    shared_chunks,
+    strip_boilerplate,
+)
+
+BANNER = "Admissions 2025: applications are open until 30 April, see the calendar."
+FOOTER = "Contact the Student Services desk for any question about your studies."
+
+
+PROGRAMMES = ["architecture", "chemistry", "physics", "mathematics", "life sciences", "computer science"]
+
+
+def _records(n: int):
+    return [
+        {"text": f"{BANNER}\nThis page describes the {name} programme and its specific requirements.\n{FOOTER}"}
+        for name in PROGRAMMES[:n]
+    ]
+
+
+def test_repeated_paragraphs_are_detected_and_stripped():
+    stats = BoilerplateStats()
+    recs = _records(6)
+    index = build_boilerplate_index(recs, min_docs=5, stats=stats)
+    assert len(index) == 2
+
+    cleaned = strip_boilerplate(recs[0]["text"], index, stats)
+    assert BANNER not in cleaned and FOOTER not in cleaned
+    assert "architecture programme" in cleaned
+    assert stats.paragraphs_removed == 2
+    assert stats.bytes_saved == len(BANNER) + len(FOOTER)
+
+
+def test_paragraphs_differing_in_numbers_stay_distinct():
+    recs = _records(5)
+    recs[0]["text"] = recs[0]["text"].replace("30 April", "15 April")
+    index = build_boilerplate_index(recs, min_docs=5)
+    # Only the footer is on all five pages; the banner with its own date is kept
+    assert len(index) == 1
+    assert "15 April" in strip_boilerplate(recs[0]["text"], index)
+
+    seen: set = set()
+    fees = [{"text": "Tuition fees for 2024: CHF 730."}, {"text": "Tuition fees for 2025: CHF 1460."}]
+    assert drop_duplicate_chunks(fees, seen) == fees
+
+
+def test_below_threshold_is_kept():
+    index = build_boilerplate_index(_records(3), min_docs=5)
+    assert len(index) == 0
+    assert strip_boilerplate(BANNER, index) == BANNER
+
+
+def test_shared_chunks_and_duplicate_collapse():
+    stats = BoilerplateStats()
+    index = build_boilerplate_index(_records(5), min_docs=5)
+    chunks = shared_chunks(index, stats)
+    assert len(chunks) == 2 and all(c["payload"]["boilerplate"] for c in chunks)
+
+    seen: set = set()
+    out = drop_duplicate_chunks([{"text": "same"}, {"text": "Same."}, {"text": "other"}], seen, stats)
+    assert [c["text"] for c in out] == ["same", "other"]
+    assert stats.duplicate_chunks_dropped == 1
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import Counter
+
+import httpx
+import pytest
+
+from conftest import BASE, make_cfg, page_html
+from epfl_scraper.crawler import Crawler
+from epfl_scraper.fetch import CLOSED, DEAD, HALF_OPEN, OPEN, HostHealth
+
+DOWN = "https://down.epfl.ch/education"
+
+
+def test_timeout_follows_latency_percentile(tmp_path):
+    cfg = make_cfg(tmp_path, request_timeout_s=20.0, latency_min_samples=10)
+    health = HostHealth("www.epfl.ch", cfg)
+    assert health.timeout() == 20.0
+    for i in range(100):
+        health.success(0.5 if i < 95 else 3.0)
+    # p95 = 3.0 s, times the default multiplier of 4
+    assert health.timeout() == 12.0
+    health.latencies.clear()
+    for _ in range(20):
+        health.success(0.05)
+    assert health.timeout() == cfg.min_timeout_s
+
+
+def test_breaker_opens_probes_and_closes(tmp_path, monkeypatch):
+    cfg = make_cfg(tmp_path, breaker_failures=2, breaker_cooldown_s=10.0, breaker_max_probes=2)
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    health = HostHealth("down.epfl.ch", cfg)
+    health.failure("ConnectError")
+    assert health.allow()
+    health.failure("ConnectError")
+    assert health.current_state() == OPEN and not health.allow()
+
+    now[0] += 10.0
+    assert health.current_state() == HALF_OPEN
+    assert health.allow() and not health.allow()  # a single probe at a time
+    health.failure("ConnectTimeout")
+    assert health.current_state() == OPEN and health.retry_in() == 20.0
+
+    now[0] += 20.0
+    assert health.allow()
+    health.success(0.2)
+    assert health.current_state() == CLOSED and health.cooldown == 10.0
+
+    for _ in range(2):
+        health.failure("ConnectError")
+    for _ in range(2):
+        now[0] += 100.0
+        assert health.allow()
+        health.failure("ConnectError")
+    assert health.current_state() == DEAD and not health.allow()
+
+
+def _mock_transport(monkeypatch, handler):
+    real = httpx.AsyncClient
+
+    def client(*args, **kwargs):
+        return real(*args, transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(httpx, "AsyncClient", client)
+
+
+def _site(requests, failures, then=None):
+    children = [f"{DOWN}/{c}" for c in "abc"]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        requests[request.url.host] += 1
+        if request.url.host == "down.epfl.ch":
+            if requests["down.epfl.ch"] <= failures:
+                raise httpx.ConnectError("connection refused", request=request)
+            if then is not None:
+                raise then("connection reset", request=request)
+            return httpx.Response(200, html=page_html(url, f"Page {url} is back."))
+        return httpx.Response(200, html=page_html("root", "Root page with links.", children))
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_crawler_parks_host_until_probe_succeeds(tmp_path, monkeypatch):
+    requests: Counter = Counter()
+    _mock_transport(monkeypatch, _site(requests, failures=2))
+    cfg = make_cfg(
+        tmp_path, max_retries=3, backoff_base_s=0.01, breaker_failures=2, breaker_cooldown_s=0.2
+    )
+    start = time.monotonic()
+    await Crawler(cfg).crawl()
+    assert time.monotonic() - start >= 0.2
+
+    urls = {json.loads(l)["url"] for l in cfg.output_jsonl.read_text(encoding="utf-8").splitlines()}
+    assert urls == {f"{BASE}/p0"} | {f"{DOWN}/{c}" for c in "abc"}
+    # Two failures open the breaker, then one probe and the two parked URLs
+    assert requests["down.epfl.ch"] == 5
+
+
+@pytest.mark.asyncio
+async def test_unreachable_host_is_given_up(tmp_path, monkeypatch):
+    requests: Counter = Counter()
+    _mock_transport(monkeypatch, _site(requests, failures=10**6))
+    cfg = make_cfg(
+        tmp_path,
+        max_retries=3,
+        backoff_base_s=0.01,
+        breaker_failures=2,
+        breaker_cooldown_s=0.05,
+        breaker_max_probes=2,
+    )
+    await Crawler(cfg).crawl()
+
+    urls = [json.loads(l)["url"] for l in cfg.output_jsonl.read_text(encoding="utf-8").splitlines()]
+    assert urls == [f"{BASE}/p0"]
+    assert requests["down.epfl.ch"] == 2 + 2
+
+
+@pytest.mark.asyncio
+async def test_probe_ending_in_non_retryable_error_does_not_hang(tmp_path, monkeypatch):
+    requests: Counter = Counter()
+    _mock_transport(monkeypatch, _site(requests, failures=2, then=httpx.ReadError))
+    cfg = make_cfg(
+        tmp_path,
+        max_retries=3,
+        backoff_base_s=0.01,
+        breaker_failures=2,
+        breaker_cooldown_s=0.05,
+        breaker_max_probes=2,
+    )
+    await asyncio.wait_for(Crawler(cfg).crawl(), timeout=10)
+
+    # Two failures open the breaker, then two failed probes give the host up
+    assert requests["down.epfl.ch"] == 2 + 2
+    # URLs of the given-up host are recorded as visited, not silently dropped
+    visited = set(cfg.visited_file.read_text(encoding="utf-8").split())
+    assert {f"{DOWN}/{c}" for c in "abc"} <= visited
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from conftest import make_cfg
+from epfl_scraper.cache import ExtractionCache
+from epfl_scraper.crawler import Crawler
+from epfl_scraper.extract import EXTRACTORS
+
+
+def test_hits_persist_and_key_includes_base_url(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = ExtractionCache(path)
+    key = ExtractionCache.key("<html>a</html>", "https://www.epfl.ch/a")
+    assert cache.get(key) is None
+    cache.put(key, "text", "title", "fr", ["https://www.epfl.ch/b"])
+    cache.close()
+
+    cache = ExtractionCache(path)
+    assert cache.get(key) == ("text", "title", "fr", ["https://www.epfl.ch/b"])
+    assert cache.get(ExtractionCache.key("<html>a</html>", "https://www.epfl.ch/other")) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_evicts_least_recently_used_beyond_size_bound(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache.sqlite", max_bytes=1000)
+    keys = [ExtractionCache.key(str(i), "u") for i in range(5)]
+    for k in keys[:4]:
+        cache.put(k, "x" * 200, None, None, [])
+    assert cache.get(keys[0]) is not None  # now the most recently used
+    cache.put(keys[4], "x" * 200, None, None, [])
+    assert cache.evictions >= 1
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_recrawl_of_unchanged_pages_skips_extraction(tmp_path, fake_site, monkeypatch):
+    fake_site.chain(7)
+    calls = []
+    real = EXTRACTORS["trafilatura"]
+    monkeypatch.setitem(EXTRACTORS, "trafilatura", lambda html, url: calls.append(url) or real(html, url))
+    cache_file = tmp_path / "extract_cache.sqlite"
+
+    first = make_cfg(tmp_path, state_dir=tmp_path / "s1", output_jsonl=tmp_path / "o1.jsonl", extract_cache_file=cache_file)
+    await Crawler(first).crawl()
+    assert len(calls) == 7
+
+    second = make_cfg(tmp_path, state_dir=tmp_path / "s2", output_jsonl=tmp_path / "o2.jsonl", extract_cache_file=cache_file)
+    await Crawler(second).crawl()
+    assert len(calls) == 7
+    strip = lambda p: [{k: v for k, v in json.loads(l).items() if k != "fetched_at"} for l in p.read_text().splitlines()]
+    assert strip(first.output_jsonl) == strip(second.output_jsonl)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from conftest import BASE, make_cfg, page_html
+from epfl_scraper.changes import ChangeFeed
+from epfl_scraper.crawler import Crawler
+
+
+def _log(changes_dir):
+    (published,) = sorted(changes_dir.glob("changes-*.jsonl"))[-1:]
+    entries = [json.loads(l) for l in published.read_text(encoding="utf-8").splitlines()]
+    published.rename(published.with_suffix(".seen"))
+    return {e["url"]: e["change"] for e in entries}
+
+
+@pytest.mark.asyncio
+async def test_second_crawl_emits_only_the_delta(tmp_path, fake_site):
+    changes = tmp_path / "changes"
+    links = [f"{BASE}/a", f"{BASE}/b", f"{BASE}/c"]
+    fake_site.add(f"{BASE}/p0", page_html("Home", "Home page text.", links))
+    fake_site.add(f"{BASE}/a", page_html("A", "Page A stays the same."))
+    fake_site.add(f"{BASE}/b", page_html("B", "Page B first version."))
+    fake_site.add(f"{BASE}/c", page_html("C", "Page C will disappear."))
+
+    await Crawler(make_cfg(tmp_path, state_dir=tmp_path / "s1", changes_dir=changes)).crawl()
+    assert set(_log(changes).values()) == {"added"}
+
+    # Second crawl: B edited, C now 404, D new and A untouched
+    fake_site.add(f"{BASE}/b", page_html("B", "Page B second version."))
+    del fake_site.pages[f"{BASE}/c"]
+    fake_site.add(f"{BASE}/p0", page_html("Home", "Home page text.", links + [f"{BASE}/d"]))
+    fake_site.add(f"{BASE}/d", page_html("D", "Brand new page D."))
+    out2 = tmp_path / "out2.jsonl"
+    await Crawler(make_cfg(tmp_path, state_dir=tmp_path / "s2", output_jsonl=out2, changes_dir=changes)).crawl()
+
+    assert _log(changes) == {
+        f"{BASE}/p0": "modified",  # its text now includes the link to D
+        f"{BASE}/a": "unchanged",
+        f"{BASE}/b": "modified",
+        f"{BASE}/c": "removed",
+        f"{BASE}/d": "added",
+    }
+    emitted = {json.loads(l)["url"] for l in out2.read_text(encoding="utf-8").splitlines()}
+    assert emitted == {f"{BASE}/p0", f"{BASE}/b", f"{BASE}/d"}
+    manifest = json.loads((changes / "manifest.json").read_text(encoding="utf-8"))
+    assert set(manifest) == {f"{BASE}/p0", f"{BASE}/a", f"{BASE}/b", f"{BASE}/d"}
+
+
+@pytest.mark.asyncio
+async def test_pages_no_longer_linked_are_removed_and_partial_crawls_publish_nothing(tmp_path, fake_site):
+    changes = tmp_path / "changes"
+    fake_site.add(f"{BASE}/p0", page_html("Home", "Home page text.", [f"{BASE}/a"]))
+    fake_site.add(f"{BASE}/a", page_html("A", "Page A."))
+    await Crawler(make_cfg(tmp_path, state_dir=tmp_path / "s1", changes_dir=changes)).crawl()
+    _log(changes)
+
+    fake_site.add(f"{BASE}/p0", page_html("Home", "Home page text."))
+    await Crawler(make_cfg(tmp_path, state_dir=tmp_path / "s2", changes_dir=changes, max_pages=0)).crawl()
+    assert not list(changes.glob("changes-*.jsonl"))
+
+    await Crawler(make_cfg(tmp_path, state_dir=tmp_path / "s3", changes_dir=changes)).crawl()
+    assert _log(changes)[f"{BASE}/a"] == "removed"
+
+
+@pytest.mark.asyncio
+async def test_unfetchable_pages_are_carried_over_and_completed_state_is_not_republished(tmp_path, fake_site):
+    changes = tmp_path / "changes"
+    fake_site.add(f"{BASE}/p0", page_html("Home", "Home page text.", [f"{BASE}/a", f"{BASE}/b"]))
+    fake_site.add(f"{BASE}/a", page_html("A", "Page A."))
+    fake_site.add(f"{BASE}/b", page_html("B", "Page B."))
+    await Crawler(make_cfg(tmp_path, state_dir=tmp_path / "s1", changes_dir=changes)).crawl()
+    _log(changes)
+    before = json.loads((changes / "manifest.json").read_text(encoding="utf-8"))
+
+    # A is still linked but answers with an empty body this time
+    fake_site.add(f"{BASE}/a", "", status=503)
+    cfg = make_cfg(tmp_path, state_dir=tmp_path / "s2", changes_dir=changes)
+    await Crawler(cfg).crawl()
+    assert f"{BASE}/a" not in _log(changes)
+    manifest = json.loads((changes / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest == before
+
+    # Running the completed state dir again publishes nothing and keeps the manifest
+    await Crawler(cfg).crawl()
+    assert not list(changes.glob("changes-*.jsonl"))
+    assert json.loads((changes / "manifest.json").read_text(encoding="utf-8")) == before
+
+
+def test_logs_published_within_one_second_do_not_collide(tmp_path):
+    published = set()
+    for _ in range(2):
+        feed = ChangeFeed(tmp_path)
+        feed.record(f"{BASE}/a", "x")
+        published.add(feed.finish(lambda u: True))
+    assert len(published) == 2 and all(p.exists() for p in published)
+    assert ChangeFeed(tmp_path).finish(lambda u: False) is None
+    assert json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8")) == {f"{BASE}/a": "x"}
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+import shutil
+
+import pytest
+
+from conftest import BASE, make_cfg
+from epfl_scraper.crawler import Crawler
+from epfl_scraper.storage import Checkpoint, JsonlRecordStore
+
+N_PAGES = 12
+
+
+def _urls(path):
+    return [json.loads(l)["url"] for l in path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_resume_after_crash_neither_duplicates_nor_drops(tmp_path, fake_site):
+    fake_site.chain(N_PAGES)
+    cfg = make_cfg(tmp_path, max_pages=4, checkpoint_every=2)
+    await Crawler(cfg).crawl()
+    snapshot = tmp_path / "checkpoint.snapshot"
+    shutil.copy(cfg.checkpoint_file, snapshot)
+    assert len(_urls(cfg.output_jsonl)) == 4
+
+    # More pages are written, then the process dies before checkpointing them
+    await Crawler(make_cfg(tmp_path, max_pages=3, checkpoint_every=100)).crawl()
+    assert len(_urls(cfg.output_jsonl)) == 7
+    shutil.copy(snapshot, cfg.checkpoint_file)
+
+    await Crawler(make_cfg(tmp_path, max_pages=100)).crawl()
+    urls = _urls(cfg.output_jsonl)
+    assert sorted(urls) == sorted(f"{BASE}/p{i}" for i in range(N_PAGES))
+    with JsonlRecordStore([cfg.output_jsonl]) as store:
+        assert len(store) == N_PAGES
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_records_frontier_and_file_sizes(tmp_path, fake_site):
+    fake_site.chain(N_PAGES)
+    cfg = make_cfg(tmp_path, max_pages=3)
+    await Crawler(cfg).crawl()
+
+    state = json.loads(cfg.checkpoint_file.read_text(encoding="utf-8"))
+    assert state["frontier"]
+    assert state["files"][str(cfg.output_jsonl.resolve())] == cfg.output_jsonl.stat().st_size
+    assert state["files"][str(cfg.visited_file.resolve())] == cfg.visited_file.stat().st_size
+
+
+def test_checkpoint_paths_survive_a_change_of_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    log = tmp_path / "log.jsonl"
+    log.write_text("a\nb\n", encoding="utf-8")
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+    checkpoint.save({"files": {"log.jsonl": 2}})
+
+    monkeypatch.chdir("/")
+    assert Checkpoint.truncate_files(checkpoint.load()) == {str(log.resolve()): 2}
+    assert log.read_text(encoding="utf-8") == "a\n"
+
+
+def test_file_shorter_than_checkpoint_is_refused(tmp_path):
+    log = tmp_path / "log.jsonl"
+    log.write_text("a\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="shorter"):
+        Checkpoint.truncate_files({"files": {str(log): 10}})
+    assert log.read_text(encoding="utf-8") == "a\n"
+
+
+def test_missing_file_is_refused_unless_allowed(tmp_path):
+    log = tmp_path / "changes.current.jsonl"
+    state = {"files": {str(tmp_path / "out.jsonl"): 0, str(log): 10}, "may_be_absent": [str(log)]}
+    assert Checkpoint.truncate_files(state) == {}
+    state["files"][str(tmp_path / "out.jsonl")] = 52
+    with pytest.raises(ValueError, match="missing"):
+        Checkpoint.truncate_files(state)
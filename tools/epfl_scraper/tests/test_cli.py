@@ -1,8 +1,14 @@
 from __future__ import annotations
 
 import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
 
-from epfl_scraper.cli import parse_args, apply_lang_presets
+import pytest
+
+from epfl_scraper.cli import apply_lang_presets, main, parse_args
 
 
 def test_lang_fr_sets_defaults_when_unset():
@@ -30,3 +36,45 @@ def test_explicit_flags_override_presets():
     assert ns.allow_path == ["/custom"]
 
 
+def test_cli_import_does_not_load_heavy_dependencies():
+    probe = (
+        "import sys, json, epfl_scraper.cli, index_texts; "
+        "print(json.dumps([m for m in ('trafilatura', 'bs4', 'httpx', 'nltk', 'requests') if m in sys.modules]))"
+    )
+    root = Path(__file__).resolve().parent.parent
+    out = subprocess.run([sys.executable, "-c", probe], cwd=root, capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout) == []
+
+
+def test_merge_shards_does_not_load_the_crawler(tmp_path):
+    output = tmp_path / "out.jsonl"
+    for i in range(2):
+        (tmp_path / f"out.shard-{i:02d}-of-02.jsonl").write_text(json.dumps({"url": f"u{i}"}) + "\n", encoding="utf-8")
+    probe = (
+        "import sys, json\n"
+        "from epfl_scraper.cli import main\n"
+        f"main(['--merge-shards', '--shards', '2', '--output', {str(output)!r}, '--state-dir', {str(tmp_path)!r}])\n"
+        "print(json.dumps([m for m in ('epfl_scraper.crawler', 'httpx', 'trafilatura') if m in sys.modules]))"
+    )
+    root = Path(__file__).resolve().parent.parent
+    out = subprocess.run([sys.executable, "-c", probe], cwd=root, capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == []
+    assert len(output.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_merge_with_wrong_shard_count_leaves_output_untouched(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text(json.dumps({"url": "kept"}) + "\n", encoding="utf-8")
+    for i in range(2):
+        (tmp_path / f"out.shard-{i:02d}-of-02.jsonl").write_text(json.dumps({"url": f"u{i}"}) + "\n", encoding="utf-8")
+    for shards in ("1", "3"):
+        with pytest.raises(SystemExit, match="check --shards"):
+            main(["--merge-shards", "--shards", shards, "--output", str(output), "--state-dir", str(tmp_path)])
+    assert output.read_text(encoding="utf-8") == json.dumps({"url": "kept"}) + "\n"
+
+
+def test_shard_index_is_validated():
+    for argv in (["--shards", "2", "--shard-index", "2", "--run-id", "r"], ["--shards", "2", "--shard-index", "0"]):
+        with pytest.raises(SystemExit):
+            parse_args(argv)
+    assert parse_args(["--shards", "2", "--shard-index", "1", "--run-id", "r"]).shard_index == 1
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pytest
+
+from epfl_scraper.extract import EXTRACTORS, get_extractor
+
+PAGE = (
+    '<html lang="fr-CH"><head><title> Bachelor | EPFL </title><script>var x = 1;</script></head><body>'
+    "<nav><ul><li>Menu</li></ul></nav>"
+    "<main><h1>Bachelor</h1><p>Admission  rules.</p><ul><li><p>Year one</p></li></ul></main>"
+    "<footer><p>Contact</p></footer></body></html>"
+)
+
+
+def test_lxml_fast_keeps_main_blocks_only():
+    text, title, lang = get_extractor("lxml-fast")(PAGE, "https://www.epfl.ch/education/")
+    assert text == "Bachelor\nAdmission rules.\nYear one"
+    assert (title, lang) == ("Bachelor | EPFL", "fr")
+
+
+def test_every_backend_returns_text_and_title():
+    for name in EXTRACTORS:
+        text, title, _ = get_extractor(name)(PAGE, "https://www.epfl.ch/education/")
+        assert "Admission" in text, name
+        assert title, name
+
+
+def test_unknown_extractor_is_rejected():
+    with pytest.raises(ValueError, match="lxml-fast"):
+        get_extractor("regex")
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import pytest
+
+from conftest import BASE, make_cfg
+from epfl_scraper.crawler import Crawler
+from epfl_scraper.graph import CsrGraph, LinkGraphRecorder, build_csr, crawl_depth, in_degree, pagerank
+
+
+def test_csr_build_merges_shards_and_dedups_edges(tmp_path):
+    a = LinkGraphRecorder(tmp_path / "a")
+    a.add_links("x", ["y", "z", "y"])
+    a.add_links("y", ["z"])
+    a.close()
+    b = LinkGraphRecorder(tmp_path / "b")
+    b.add_links("z", ["x"])
+    b.add_links("y", ["z"])
+    b.close()
+
+    meta = build_csr([tmp_path / "a", tmp_path / "b"], tmp_path / "csr")
+    assert meta == {"n_nodes": 3, "n_edges": 4}
+    with CsrGraph(tmp_path / "csr") as g:
+        urls = g.urls()
+        ids = {u: i for i, u in enumerate(urls)}
+        assert sorted(urls[v] for v in g.neighbors(ids["x"])) == ["y", "z"]
+        assert list(in_degree(g)) == [1, 1, 2]
+        assert list(crawl_depth(g, [ids["y"]])) == [2, 0, 1]
+        pr = pagerank(g)
+        assert abs(sum(pr) - 1.0) < 1e-6
+        assert max(range(3), key=lambda i: pr[i]) == ids["z"]
+        assert urls == sorted(urls)
+        assert CsrGraph.node(urls, "y") == ids["y"] and CsrGraph.node(urls, "w") is None
+
+
+@pytest.mark.asyncio
+async def test_crawler_records_link_graph(tmp_path, fake_site):
+    fake_site.chain(7)
+    await Crawler(make_cfg(tmp_path, link_graph_dir=tmp_path / "graph")).crawl()
+
+    build_csr([tmp_path / "graph"], tmp_path / "csr")
+    with CsrGraph(tmp_path / "csr") as g:
+        ids = {u: i for i, u in enumerate(g.urls())}
+        assert g.n_nodes == 7 and g.n_edges == 6
+        depth = crawl_depth(g, [ids[f"{BASE}/p0"]])
+        assert depth[ids[f"{BASE}/p6"]] == 2
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+
+import index_texts
+from epfl_scraper.search_index import LocalIndexWriter
+
+
+def _record(url: str, text: str, checksum: str) -> str:
+    return json.dumps({"url": url, "text": text, "title": None, "lang": "en", "checksum": checksum}) + "\n"
+
+
+def test_local_index_inside_data_dir_is_not_read_back(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "out.jsonl").write_text(_record("https://www.epfl.ch/a", "Admission.", "a1"), encoding="utf-8")
+    writer = LocalIndexWriter(data / "local_index")
+    writer.add([{"id": "a1_0", "text": "Admission.", "title": None, "url": "https://www.epfl.ch/a", "payload": {}}])
+    writer.flush()
+    assert list(data.rglob("*.json"))  # segment files the scan would otherwise pick up
+
+    assert index_texts.find_input_files(data, exclude=[data / "local_index"]) == [data / "out.jsonl"]
+
+
+def test_non_object_values_are_not_records(tmp_path):
+    ids = tmp_path / "ids.json"
+    ids.write_text(json.dumps(["a_0", "b_0", {"url": "u", "text": "t"}]), encoding="utf-8")
+    assert list(index_texts.load_json_records(ids)) == [{"url": "u", "text": "t"}]
+
+
+def test_shard_outputs_are_not_indexed_next_to_the_merged_file(tmp_path):
+    for name in ("out.jsonl", "out.shard-00-of-02.jsonl", "out.shard-01-of-02.jsonl"):
+        (tmp_path / name).write_text(_record("https://www.epfl.ch/a", "Admission.", "a1"), encoding="utf-8")
+    assert index_texts.find_input_files(tmp_path) == [tmp_path / "out.jsonl"]
+
+
+def test_only_page_versions_in_the_manifest_are_kept(tmp_path):
+    changes = tmp_path / "changes"
+    (changes / "shard-00").mkdir(parents=True)
+    (changes / "shard-00" / "manifest.json").write_text(json.dumps({"a": "a1", "b": "b2"}), encoding="utf-8")
+    delta1 = tmp_path / "delta_1.jsonl"
+    delta1.write_text(_record("a", "A.", "a1") + _record("b", "B old.", "b1") + _record("c", "C gone.", "c1"), encoding="utf-8")
+    delta2 = tmp_path / "delta_2.jsonl"
+    delta2.write_text(_record("b", "B new.", "b2") + _record("a", "A.", "a1"), encoding="utf-8")
+
+    manifest = index_texts.load_manifest(changes)
+    seen: set = set()
+    kept = [
+        (r["url"], r["checksum"])
+        for f in (delta1, delta2)
+        for r in index_texts.current_records(index_texts.load_json_records(f), manifest, seen)
+    ]
+    assert kept == [("a", "a1"), ("b", "b2")]
+    assert list(index_texts.current_records([{"url": "x", "text": "no checksum"}], manifest)) == [
+        {"url": "x", "text": "no checksum"}
+    ]
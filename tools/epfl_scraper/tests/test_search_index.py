@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from epfl_scraper.search_index import (
+    LocalIndex,
+    LocalIndexWriter,
+    decode_postings,
+    encode_postings,
+    tokenize,
+)
+
+
+def _chunk(cid: str, text: str, url: str = "https://www.epfl.ch/education/x"):
+    return {"id": cid, "text": text, "title": None, "url": url, "payload": {"lang": "fr"}}
+
+
+def test_postings_roundtrip_with_large_gaps():
+    postings = [(0, 1), (3, 2), (200, 1), (70_000, 5)]
+    blob = encode_postings(postings)
+    assert list(decode_postings(blob, 0, len(blob))) == postings
+    assert len(blob) < 4 * len(postings) * 2
+
+
+def test_tokenize_folds_accents_and_stopwords():
+    assert tokenize("Les Étudiants de l'EPFL") == ["etudiant", "epfl"]
+    assert tokenize("students and the student") == ["student", "student"]
+
+
+def test_search_ranks_matching_chunk_first(tmp_path):
+    writer = LocalIndexWriter(tmp_path)
+    writer.add([
+        _chunk("a", "Admission au bachelor: conditions et délais d'inscription."),
+        _chunk("b", "Master programmes in computer science and data science."),
+        _chunk("c", "Bourses d'excellence pour les étudiants de master."),
+    ])
+    writer.flush()
+    with LocalIndex(tmp_path) as index:
+        hits = index.search("master computer science", k=2)
+        assert [h.chunk["id"] for h in hits] == ["b", "c"]
+        assert index.search("inscription bachelor")[0].chunk["id"] == "a"
+
+
+def test_merge_keeps_newest_copy_of_a_chunk(tmp_path):
+    writer = LocalIndexWriter(tmp_path)
+    writer.add([_chunk("a", "old calendar text"), _chunk("b", "exam calendar")])
+    writer.flush()
+    writer.add([_chunk("a", "new semester calendar")])
+    writer.flush()
+
+    with LocalIndex(tmp_path) as index:
+        assert len(index.segments) == 2
+        assert {h.chunk["text"] for h in index.search("calendar", k=5)} == {"new semester calendar", "exam calendar"}
+
+    writer.merge()
+    with LocalIndex(tmp_path) as index:
+        assert len(index.segments) == 1
+        assert index.n_docs == 2
+        assert index.search("semester")[0].chunk["id"] == "a"
+        assert index.search("old") == []
+
+
+def test_superseded_chunks_do_not_skew_statistics(tmp_path):
+    writer = LocalIndexWriter(tmp_path)
+    writer.add([_chunk("a", "calendar " * 20), _chunk("b", "exam calendar")])
+    writer.flush()
+    writer.add([_chunk("a", "semester")])
+    writer.flush()
+    with LocalIndex(tmp_path) as index:
+        assert index.n_docs == 2
+        assert index.avgdl == (1 + 2) / 2
+        assert [h.chunk["id"] for h in index.search("calendar", k=5)] == ["b"]
+
+
+def test_replace_all_drops_chunks_missing_from_the_new_run(tmp_path):
+    writer = LocalIndexWriter(tmp_path)
+    writer.add([_chunk("a", "removed page"), _chunk("b", "kept page")])
+    writer.flush()
+    writer.add([_chunk("b", "kept page")])
+    writer.flush(replace_all=True)
+    with LocalIndex(tmp_path) as index:
+        assert len(index.segments) == 1
+        assert [h.chunk["id"] for h in index.search("page", k=5)] == ["b"]
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_dir()) == ["seg-000002"]
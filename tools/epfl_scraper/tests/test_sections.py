@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from conftest import make_cfg, page_html
+from epfl_scraper.config import SectionConfig, load_sections
+from epfl_scraper.crawler import Crawler
+
+EN = "https://www.epfl.ch/education"
+FR = "https://www.epfl.ch/education/fr"
+
+
+def _records(path):
+    return [json.loads(l) for l in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_load_sections_validates(tmp_path):
+    job = tmp_path / "job.json"
+    job.write_text(json.dumps({"sections": [
+        {"label": "fr", "start": [FR + "/"], "allow_paths": ["/education/fr"], "output": "data/fr.jsonl"},
+    ]}), encoding="utf-8")
+    (section,) = load_sections(job)
+    assert section.label == "fr" and section.output_jsonl.name == "fr.jsonl"
+
+    job.write_text(json.dumps({"sections": [{"label": "fr"}]}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_sections(job)
+
+
+@pytest.mark.asyncio
+async def test_sections_share_one_crawl_and_route_records(tmp_path, fake_site):
+    # Both home pages link to the shared nav page and to each other
+    fake_site.add(EN, page_html("Home", "English education home page.", [f"{EN}/nav", FR]))
+    fake_site.add(FR, page_html("Accueil", "Page d'accueil de l'enseignement.", [f"{FR}/cours", f"{EN}/nav"]))
+    fake_site.add(f"{EN}/nav", page_html("Nav", "Shared navigation page.", [EN, FR]))
+    fake_site.add(f"{FR}/cours", page_html("Cours", "Liste des cours.", []))
+
+    cfg = make_cfg(tmp_path, sections=[
+        SectionConfig("education-en", [EN + "/"], ["/education"], tmp_path / "en.jsonl"),
+        SectionConfig("education-fr", [FR + "/"], ["/education/fr"], tmp_path / "fr.jsonl"),
+    ])
+    await Crawler(cfg).crawl()
+
+    en, fr = _records(tmp_path / "en.jsonl"), _records(tmp_path / "fr.jsonl")
+    assert {r["url"] for r in en} == {EN, f"{EN}/nav"}
+    assert {r["url"] for r in fr} == {FR, f"{FR}/cours"}
+    assert {r["section"] for r in en} == {"education-en"}
+    assert {r["section"] for r in fr} == {"education-fr"}
+    # The shared page was fetched once for both sections
+    assert all(n == 1 for n in fake_site.fetches.values())
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import replace
+
+import pytest
+
+from conftest import BASE, make_cfg
+from epfl_scraper.crawler import Crawler
+from epfl_scraper.sharding import SharedStore, merge_shard_outputs, shard_for
+
+N_PAGES = 12
+
+
+def test_shard_for_is_stable_and_partitions():
+    urls = [f"{BASE}/p{i}" for i in range(200)]
+    owners = [shard_for(u, 4) for u in urls]
+    assert owners == [shard_for(u, 4) for u in urls]
+    assert set(owners) == {0, 1, 2, 3}
+    assert shard_for(urls[0], 1) == 0
+
+
+def test_shared_store_routing_and_termination(tmp_path):
+    store = SharedStore(tmp_path / "shared.sqlite")
+    store.push([(1, "a"), (1, "b"), (1, "a")])
+    urls, cursor = store.pull(1, 0)
+    assert urls == ["a", "b"]
+    assert store.pull(1, cursor) == ([], cursor)
+
+    store.set_status(0, 0, "idle")
+    assert not store.all_done(2)
+    store.set_status(1, 0, "idle")
+    assert not store.all_done(2)  # shard 1 has unread links
+    store.set_status(1, cursor, "idle")
+    assert store.all_done(2)
+
+    assert store.reserve_slot("www.epfl.ch", 10.0) == 0
+    assert store.reserve_slot("www.epfl.ch", 10.0) > 9.0
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_two_shards_crawl_disjoint_halves(tmp_path, fake_site):
+    fake_site.chain(N_PAGES)
+    cfg = make_cfg(tmp_path, shard_count=2, shard_poll_s=0.01)
+    shards = [cfg.for_shard(i) for i in range(2)]
+    await asyncio.gather(*(Crawler(c).crawl() for c in shards))
+
+    per_shard = [
+        {json.loads(l)["url"] for l in c.output_jsonl.read_text(encoding="utf-8").splitlines()} for c in shards
+    ]
+    assert not per_shard[0] & per_shard[1]
+    assert per_shard[0] | per_shard[1] == {f"{BASE}/p{i}" for i in range(N_PAGES)}
+    for i, urls in enumerate(per_shard):
+        assert all(shard_for(u, 2) == i for u in urls)
+
+    assert merge_shard_outputs([c.output_jsonl for c in shards], cfg.output_jsonl) == N_PAGES
+
+
+def test_late_shard_sees_finished_peers_of_the_same_run(tmp_path):
+    store = SharedStore(tmp_path / "shared.sqlite")
+    store.set_status(0, 0, "finished", "old")
+    store.set_status(1, 0, "finished", "run-1")
+    assert not store.all_done(2, "run-1")  # shard 0 has not started this run yet
+    store.set_status(0, 0, "idle", "run-1")
+    assert store.all_done(2, "run-1")
+    store.close()
+
+
+def test_merge_creates_missing_output_directory(tmp_path):
+    shard = tmp_path / "out.shard-00-of-01.jsonl"
+    shard.write_text(json.dumps({"url": f"{BASE}/p0", "text": "x"}) + "\n", encoding="utf-8")
+    dest = tmp_path / "merged" / "out.jsonl"
+    assert merge_shard_outputs([shard], dest) == 1
+    assert dest.exists()
+
+
+def test_silent_or_missing_shards_are_taken_as_dead(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    store = SharedStore(tmp_path / "shared.sqlite")
+    store.set_status(0, 0, "idle", "r")
+    assert not store.all_done(3, "r", stale_after=60)  # shard 1 active, shard 2 not started yet
+    store.set_status(1, 0, "active", "r")
+    now[0] += 61
+    store.set_status(0, 0, "idle", "r")
+    assert store.all_done(3, "r", stale_after=60)
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_shard_does_not_wait_for_a_peer_that_never_starts(tmp_path, fake_site):
+    fake_site.chain(N_PAGES)
+    cfg = make_cfg(tmp_path, shard_count=2, shard_poll_s=0.01, shard_heartbeat_s=0.2, run_id="r")
+    alive = cfg.for_shard(shard_for(f"{BASE}/p0", 2))
+    await asyncio.wait_for(Crawler(alive).crawl(), timeout=10)
+    urls = {json.loads(l)["url"] for l in alive.output_jsonl.read_text(encoding="utf-8").splitlines()}
+    assert f"{BASE}/p0" in urls
+
+
+@pytest.mark.asyncio
+async def test_rerun_with_one_shard_already_completed(tmp_path, fake_site):
+    fake_site.chain(N_PAGES)
+    cfg = make_cfg(tmp_path, shard_count=2, shard_poll_s=0.01)
+    first = replace(cfg, run_id="first")
+    await asyncio.gather(
+        Crawler(first.for_shard(0)).crawl(), Crawler(replace(first.for_shard(1), max_pages=1)).crawl()
+    )
+
+    # Shard 0 completed, shard 1 was stopped early; both are run again
+    second = [replace(cfg, run_id="second").for_shard(i) for i in range(2)]
+    await asyncio.wait_for(asyncio.gather(*(Crawler(c).crawl() for c in second)), timeout=10)
+    urls = set()
+    for c in second:
+        urls |= {json.loads(l)["url"] for l in c.output_jsonl.read_text(encoding="utf-8").splitlines()}
+    assert urls == {f"{BASE}/p{i}" for i in range(N_PAGES)}
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+
+from epfl_scraper.storage import JsonlRecordStore, JsonlWriter, index_path_for
+
+
+def _rec(i: int) -> dict:
+    return {"url": f"https://www.epfl.ch/education/p{i}", "checksum": f"c{i}", "text": f"Page {i} – é", "section": "education"}
+
+
+def test_lookup_by_url_and_checksum(tmp_path):
+    out = tmp_path / "out.jsonl"
+    writer = JsonlWriter(out)
+    for i in range(5):
+        writer.write(_rec(i))
+    writer.close()
+
+    assert len(index_path_for(out).read_text(encoding="utf-8").splitlines()) == 5
+    with JsonlRecordStore([out]) as store:
+        assert len(store) == 5
+        assert store.get_by_url("https://www.epfl.ch/education/p3")["text"] == "Page 3 – é"
+        assert store.get_by_checksum("c1")["url"].endswith("/p1")
+        assert store.get_by_url("https://www.epfl.ch/missing") is None
+        subset = list(store.iter_records(lambda e: e["checksum"] in {"c0", "c4"}))
+        assert [r["checksum"] for r in subset] == ["c0", "c4"]
+
+
+def test_unindexed_tail_and_multiple_shards(tmp_path):
+    a, b = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    writer = JsonlWriter(a)
+    writer.write(_rec(0))
+    writer.close()
+    # Appended without a sidecar entry, as an older crawler would have done
+    with a.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(_rec(1), ensure_ascii=False) + "\n")
+    writer = JsonlWriter(b, index=False)
+    writer.write(_rec(2))
+    writer.close()
+
+    with JsonlRecordStore([a, b]) as store:
+        assert len(store) == 3
+        assert store.get_by_checksum("c1")["url"].endswith("/p1")
+        assert store.locate_url("https://www.epfl.ch/education/p2").shard == 1
+
+
+def test_legacy_output_without_sidecar_stays_readable(tmp_path):
+    out = tmp_path / "out.jsonl"
+    out.write_text("".join(json.dumps(_rec(i), ensure_ascii=False) + "\n" for i in range(3)), encoding="utf-8")
+    writer = JsonlWriter(out)
+    writer.write(_rec(3))
+    writer.close()
+
+    assert len(index_path_for(out).read_text(encoding="utf-8").splitlines()) == 4
+    # A sidecar that only covers later records: the prefix before it is scanned
+    index_path_for(out).write_text(
+        index_path_for(out).read_text(encoding="utf-8").splitlines(keepends=True)[-1], encoding="utf-8"
+    )
+    with JsonlRecordStore([out]) as store:
+        assert len(store) == 4
+        assert store.get_by_checksum("c0")["url"].endswith("/p0")
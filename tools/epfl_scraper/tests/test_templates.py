@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from lxml import html as lxml_html
+
+from epfl_scraper.extract import extract_text
+from epfl_scraper.templates import TemplateExtractor, agreement, layout_fingerprint
+
+
+def cms_page(i: int, content_class: str = "entry-content") -> str:
+    paras = "".join(
+        f"<p>Paragraph {k} of page {i}: the programme covers courses, credits and admission rules in year {k}.</p>"
+        for k in range(6)
+    )
+    return (
+        f'<html lang="fr"><head><title>Page {i} | EPFL</title></head>'
+        f'<body class="page-template-default page-id-{i}">'
+        f'<header id="header"><nav><a href="/">Accueil</a><a href="/a">Admission</a></nav></header>'
+        f'<div class="container"><aside class="sidebar"><ul><li>Menu A</li><li>Menu B</li></ul></aside>'
+        f'<main id="main"><div class="{content_class}"><h1>Title {i}</h1>{paras}</div></main></div>'
+        f"<footer><p>EPFL footer contact</p></footer></body></html>"
+    )
+
+
+def test_fingerprint_ignores_page_ids_but_not_layout():
+    fp = lambda h: layout_fingerprint(lxml_html.fromstring(h))
+    assert fp(cms_page(1)) == fp(cms_page(2))
+    assert fp(cms_page(1)) != fp(cms_page(1, content_class="news-body"))
+
+
+def test_learned_template_skips_generic_extraction(tmp_path):
+    calls = []
+
+    def generic(html, url):
+        calls.append(url)
+        return extract_text(html, url)
+
+    ex = TemplateExtractor(tmp_path / "templates.json", generic=generic, sample_size=3, validate_every=10)
+    for i in range(40):
+        text, title, lang = ex.extract(cms_page(i), f"https://www.epfl.ch/p{i}")
+        expected = extract_text(cms_page(i), f"https://www.epfl.ch/p{i}")
+        assert agreement(expected[0], text) > 0.95
+        assert (title, lang) == expected[1:]
+
+    # 3 learning pages, then one validation every 10 fast pages
+    assert ex.stats.generic == len(calls) == 3 + 3
+    assert ex.stats.fast == 34 and ex.stats.validation_failures == 0
+    ex.save()
+    reloaded = TemplateExtractor(tmp_path / "templates.json", generic=generic)
+    reloaded.extract(cms_page(99), "https://www.epfl.ch/p99")
+    assert reloaded.stats.fast == 1
+
+
+def test_failed_validation_sends_layout_back_to_learning():
+    drifted = False
+
+    def generic(html, url):
+        text, title, lang = extract_text(html, url)
+        return ("Completely different content" if drifted else text), title, lang
+
+    ex = TemplateExtractor(generic=generic, sample_size=2, validate_every=3)
+    for i in range(2):
+        ex.extract(cms_page(i), f"u{i}")
+    assert [t.status for t in ex.templates.values()] == ["learned"]
+    drifted = True
+    for i in range(3):
+        ex.extract(cms_page(10 + i), f"v{i}")
+    assert ex.stats.validation_failures == 1
+    assert [t.status for t in ex.templates.values()] == ["learning"]
+
+
+def test_validation_pages_return_the_same_text_as_fast_pages():
+    ex = TemplateExtractor(generic=extract_text, sample_size=2, validate_every=2)
+    for i in range(2):
+        ex.extract(cms_page(i), f"u{i}")
+    fast = ex.extract(cms_page(7), "u7")
+    validated = ex.extract(cms_page(7), "u7")
+    assert ex.stats.validations == 1 and ex.stats.validation_failures == 0
+    assert validated == fast
+
+
+def test_templates_are_stored_per_extractor(tmp_path):
+    state = tmp_path / "templates.json"
+    ex = TemplateExtractor(state, generic=extract_text, sample_size=2, generic_name="trafilatura")
+    for i in range(2):
+        ex.extract(cms_page(i), f"u{i}")
+    ex.save()
+    other = TemplateExtractor(state, generic=extract_text, generic_name="bs4")
+    assert other.templates == {}
+    other.save()
+    assert [t.status for t in TemplateExtractor(state, generic_name="trafilatura").templates.values()] == ["learned"]
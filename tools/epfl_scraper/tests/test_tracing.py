@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+
+from conftest import BASE, make_cfg
+from epfl_scraper.crawler import Crawler
+from epfl_scraper.fetch import PoliteHttpClient
+from epfl_scraper.tracing import Tracer
+
+
+def _events(trace_dir):
+    events = []
+    for path in sorted(trace_dir.glob("trace-*.json")):
+        events.extend(json.loads(path.read_text(encoding="utf-8")))
+    return events
+
+
+def test_sampling_is_deterministic_and_files_rotate(tmp_path):
+    tracer = Tracer(tmp_path, sample_rate=0.5, max_events=10, max_files=2)
+    urls = [f"{BASE}/p{i}" for i in range(200)]
+    picked = [u for u in urls if tracer.sampled(u)]
+    assert 60 < len(picked) < 140
+    assert picked == [u for u in urls if Tracer(tmp_path, sample_rate=0.5).sampled(u)]
+
+    for u in picked[:20]:
+        with tracer.span("extract", u):
+            pass
+    tracer.close()
+    files = sorted(tmp_path.glob("trace-*.json"))
+    assert len(files) == 2
+    for f in files:
+        events = json.loads(f.read_text(encoding="utf-8"))
+        named = {e["tid"] for e in events if e["ph"] == "M"}
+        assert {e["tid"] for e in events if e["ph"] == "X"} <= named
+
+
+def test_disabled_tracer_writes_nothing(tmp_path):
+    tracer = Tracer(None, sample_rate=1.0)
+    assert not tracer.sampled("https://www.epfl.ch/")
+    tracer.add_span("page", "https://www.epfl.ch/", 0.0, 1.0)
+    tracer.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_spans(tmp_path):
+    cfg = make_cfg(tmp_path, obey_robots=False)
+    tracer = Tracer(tmp_path / "trace", sample_rate=1.0)
+    client = PoliteHttpClient(cfg, tracer=tracer)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, html="<p>hi</p>")
+    ))
+    try:
+        assert (await client.fetch(f"{BASE}/p0")).text == "<p>hi</p>"
+    finally:
+        await client.close()
+        tracer.close()
+    names = {e["name"] for e in _events(tmp_path / "trace") if e["ph"] == "X"}
+    assert {"rate_limit", "request", "decode"} <= names
+
+
+@pytest.mark.asyncio
+async def test_crawl_writes_per_url_timeline(tmp_path, fake_site):
+    fake_site.chain(3)
+    await Crawler(make_cfg(tmp_path, trace_dir=tmp_path / "trace", trace_sample_rate=1.0)).crawl()
+
+    events = _events(tmp_path / "trace")
+    tracks = {e["args"]["name"]: e["tid"] for e in events if e["ph"] == "M"}
+    assert set(tracks) == {f"{BASE}/p{i}" for i in range(3)}
+    p1 = {e["name"] for e in events if e["ph"] == "X" and e["tid"] == tracks[f"{BASE}/p1"]}
+    assert {"queue_wait", "extract", "links", "write", "page"} <= p1